@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Benchmark offline do YouTube Downloader Pro
+
+Roda o pipeline de verdade (yt-dlp, merge do FFmpeg, pool de transcrição)
+contra mídia sintética servida em 127.0.0.1, sem acessar o YouTube:
+
+- um extrator de teste responde às URLs http://127.0.0.1:<porta>/bench/...
+  com formatos separados de vídeo e áudio, como o YouTube faz;
+- o motor de transcrição "stub" só mede o volume do áudio, então o tempo
+  medido é o do programa e não o do modelo (use --transcriber para um
+  motor real).
+
+Cenários: lote de vídeos (download + merge), playlist e só transcrição.
+
+Uso:
+    python benchmark.py
+    python benchmark.py --items 8 --seconds 30 --json bench.json
+    python benchmark.py --baseline bench.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from yt_dlp.extractor.common import InfoExtractor
+
+import youtube_downloader_pro as ydp
+
+
+class StubBackend(ydp.TranscriberBackend):
+    """Motor de transcrição falso: um segmento a cada 5s com o volume (RMS) do trecho"""
+
+    WINDOW = 5 * ydp.WHISPER_SAMPLE_RATE
+
+    def transcribe(self, audio, language=None):
+        segments = []
+        for start in range(0, len(audio), self.WINDOW):
+            window = audio[start:start + self.WINDOW]
+            rms = float((window ** 2).mean() ** 0.5) if len(window) else 0.0
+            segments.append((start / ydp.WHISPER_SAMPLE_RATE,
+                             (start + len(window)) / ydp.WHISPER_SAMPLE_RATE, f" rms {rms:.3f}"))
+        return self.result(segments, language or "pt")
+
+
+# No nível do módulo: os processos "spawn" do pool importam este arquivo e precisam do motor
+ydp.TRANSCRIBER_BACKENDS['stub'] = StubBackend
+
+
+class BenchIE(InfoExtractor):
+    """Extrator de teste: /bench/video/<id> e /bench/list/<quantidade>/<nome>"""
+
+    IE_NAME = 'bench'
+    _VALID_URL = r'http://127\.0\.0\.1:(?P<port>\d+)/bench/(?P<kind>video|list)/(?P<id>[^?#]+)'
+
+    def _real_extract(self, url):
+        port, kind, video_id = self._match_valid_url(url).group('port', 'kind', 'id')
+        base = f"http://127.0.0.1:{port}"
+        if kind == 'list':
+            count, name = video_id.split("/", 1)
+            entries = [self.url_result(f"{base}/bench/video/{name}-{index}", BenchIE.ie_key(),
+                                       f"{name}-{index}", f"Bench {name} {index}")
+                       for index in range(1, int(count) + 1)]
+            return self.playlist_result(entries, name, f"Bench {name}")
+        return {
+            'id': video_id,
+            'title': f"Bench {video_id}",
+            'webpage_url': url,
+            'formats': [
+                {'format_id': 'v240', 'url': f"{base}/media/video.mp4", 'ext': 'mp4',
+                 'vcodec': 'avc1.42c00d', 'acodec': 'none', 'width': 320, 'height': 240, 'tbr': 300},
+                {'format_id': 'a64', 'url': f"{base}/media/audio.m4a", 'ext': 'm4a',
+                 'vcodec': 'none', 'acodec': 'mp4a.40.2', 'abr': 64, 'asr': 44100},
+            ],
+        }
+
+
+def install_extractor():
+    """Coloca o BenchIE na frente dos extratores que todo YoutubeDL registra"""
+    module = sys.modules['yt_dlp.YoutubeDL']
+    classes, by_key = module.gen_extractor_classes, module.get_info_extractor
+    module.gen_extractor_classes = lambda: [BenchIE, *classes()]
+    module.get_info_extractor = lambda ie_key: BenchIE if ie_key == BenchIE.ie_key() else by_key(ie_key)
+
+
+def make_media(directory, seconds):
+    """Gera com o FFmpeg um vídeo H.264 sem áudio e um áudio AAC separados"""
+    lavfi = ['ffmpeg', '-y', '-v', 'error', '-f', 'lavfi']
+    subprocess.run(lavfi + ['-i', f"testsrc=size=320x240:rate=25:duration={seconds}",
+                            '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p',
+                            os.path.join(directory, "video.mp4")], check=True)
+    subprocess.run(lavfi + ['-i', f"sine=frequency=440:duration={seconds}",
+                            '-c:a', 'aac', '-b:a', '64k', os.path.join(directory, "audio.m4a")], check=True)
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(directory):
+    """Serve `directory` em 127.0.0.1 numa porta livre e devolve a URL base"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def run_scenario(name, jobs, engine):
+    """Roda os jobs num engine novo e resume tempo, bytes e etapas"""
+    started = time.perf_counter()
+    try:
+        engine.run_batch(jobs)
+    finally:
+        engine.close()
+    wall = time.perf_counter() - started
+
+    stages = engine.metrics.snapshot()
+    downloaded = stages.get('download', {}).get('bytes', 0)
+    firsts = [job.first_transcript_seconds for job in jobs if job.first_transcript_seconds is not None]
+    return {
+        'scenario': name,
+        'jobs': len(jobs),
+        'failed': sum(job.status != "concluido" for job in jobs),
+        'wall_seconds': round(wall, 3),
+        'downloaded_mb': round(downloaded / 1024 / 1024, 2),
+        'mb_per_second': round(downloaded / 1024 / 1024 / wall, 2) if wall else 0.0,
+        'first_transcript_seconds': round(min(firsts), 3) if firsts else None,
+        'stages': stages,
+    }
+
+
+def run_benchmark(args, base_url, output):
+    common = dict(reuse="off", retries=0)
+    spec = dict(backend=args.transcriber, model_name=args.model)
+
+    def engine():
+        return ydp.DownloadEngine(workers=args.workers, log=print if args.verbose else (lambda message: None),
+                                  quiet=not args.verbose, transcribe_workers=args.transcribe_workers,
+                                  transcript_cache=False, metrics=ydp.StageMetrics())
+
+    def folder(name):
+        path = os.path.join(output, name)
+        os.makedirs(path)
+        return path
+
+    scenarios = [
+        ("lote", [ydp.DownloadJob(url=f"{base_url}/bench/video/lote-{index}", download_path=folder(f"lote-{index}"),
+                                  **common)
+                  for index in range(1, args.items + 1)]),
+        ("playlist", [ydp.DownloadJob(url=f"{base_url}/bench/list/{args.items}/pl", download_path=folder("playlist"),
+                                      playlist=True, playlist_workers=args.workers, **common)]),
+        ("transcricao", [ydp.DownloadJob(url=f"{base_url}/bench/video/tr-{index}", download_path=folder(f"tr-{index}"),
+                                         transcript_only=True, **spec, **common)
+                         for index in range(1, args.items + 1)]),
+    ]
+    results = []
+    for name, jobs in scenarios:
+        if args.only and name not in args.only:
+            continue
+        result = run_scenario(name, jobs, engine())
+        results.append(result)
+        first = result['first_transcript_seconds']
+        print(f"{name:12} {result['wall_seconds']:7.2f}s  {result['jobs']} jobs  {result['failed']} falhas  "
+              f"{result['downloaded_mb']:6.1f} MB  {result['mb_per_second']:6.1f} MB/s"
+              + (f"  1ª transcrição {first:.2f}s" if first is not None else ""))
+        print(f"{'':12} {ydp.format_stages(result['stages'])}")
+    return results
+
+
+def compare(results, baseline_file, tolerance):
+    """Lista os cenários que ficaram mais lentos que a referência além da tolerância"""
+    with open(baseline_file, encoding='utf-8') as f:
+        baseline = {result['scenario']: result for result in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        reference = baseline.get(result['scenario'])
+        if reference and result['wall_seconds'] > reference['wall_seconds'] * (1 + tolerance):
+            regressions.append(f"{result['scenario']}: {result['wall_seconds']:.2f}s "
+                               f"(referência {reference['wall_seconds']:.2f}s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline do YouTube Downloader Pro")
+    parser.add_argument("--items", type=int, default=6, help="vídeos por cenário")
+    parser.add_argument("--seconds", type=int, default=20, help="duração da mídia sintética")
+    parser.add_argument("--workers", type=int, default=3, help="downloads simultâneos")
+    parser.add_argument("--transcribe-workers", type=int, default=2, help="processos de transcrição")
+    parser.add_argument("--transcriber", default="stub", choices=sorted(ydp.TRANSCRIBER_BACKENDS),
+                        help="motor de transcrição (stub não carrega modelo nenhum)")
+    parser.add_argument("--model", default="tiny", choices=ydp.WHISPER_MODELS,
+                        help="modelo, para motores reais")
+    parser.add_argument("--only", action="append", choices=("lote", "playlist", "transcricao"),
+                        help="roda só este cenário (pode repetir)")
+    parser.add_argument("--json", metavar="ARQUIVO", help="salva os resultados em JSON")
+    parser.add_argument("--baseline", metavar="ARQUIVO",
+                        help="JSON de uma execução anterior; sai com código 1 se algum cenário ficar mais lento")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="folga sobre a referência antes de acusar regressão (0.2 = 20%%)")
+    parser.add_argument("--verbose", action="store_true", help="mostra o log do programa")
+    args = parser.parse_args()
+
+    if not ydp.is_ffmpeg_installed():
+        print("❌ FFmpeg não encontrado")
+        return 1
+
+    workdir = tempfile.mkdtemp(prefix="ydp-bench-")
+    # Cache, índice e diário isolados: nada de execuções anteriores é reaproveitado
+    os.environ['XDG_CACHE_HOME'] = os.path.join(workdir, "cache")
+    try:
+        media = os.path.join(workdir, "media")
+        os.makedirs(media)
+        make_media(media, args.seconds)
+        server, base_url = start_server(workdir)
+        install_extractor()
+        try:
+            results = run_benchmark(args, base_url, os.path.join(workdir, "out"))
+        finally:
+            server.shutdown()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, ensure_ascii=False, indent=2)
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for regression in regressions:
+            print(f"❌ Regressão: {regression}")
+        if regressions:
+            return 1
+    return 1 if any(result['failed'] for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,32 +4,2704 @@ YouTube Video Downloader Pro - Versão Simplificada
 Funciona sem MoviePy - Usa apenas yt-dlp e whisper
 """
 
+import time
+
+# Marca o início do processo para medir o tempo até a primeira janela
+_PROCESS_START = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import threading
 import os
 import sys
 import subprocess
+import argparse
+import queue
+from collections import deque
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field, fields
 from datetime import datetime
 import re
+import json
+import hashlib
+import random
+import uuid
+import socket
+import itertools
+import logging
+from logging.handlers import RotatingFileHandler, MemoryHandler
+import shutil
+import tempfile
+import sqlite3
+from functools import lru_cache
+from contextlib import contextmanager
+from urllib.parse import urlparse, parse_qs, urlencode
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import urllib.request
+import urllib.error
+
+# Imports básicos
+try:
+    import yt_dlp
+except ImportError:
+    print("Instalando yt-dlp...")
+    subprocess.check_call([sys.executable, "-m", "pip", "install", "yt-dlp"])
+    import yt_dlp
+
+
+def import_whisper():
+    """Importa o whisper (e o torch) só quando alguém vai transcrever"""
+    try:
+        import whisper
+    except ImportError:
+        print("Instalando whisper...")
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "openai-whisper"])
+        import whisper
+    return whisper
+
+
+def import_faster_whisper():
+    """Importa o faster-whisper (CTranslate2) só quando esse motor é usado"""
+    try:
+        import faster_whisper
+    except ImportError:
+        print("Instalando faster-whisper...")
+        subprocess.check_call([sys.executable, "-m", "pip", "install", "faster-whisper"])
+        import faster_whisper
+    return faster_whisper
+
+@lru_cache(maxsize=None)
+def is_ffmpeg_installed():
+    """Verifica se ffmpeg está disponível no sistema
+
+    O resultado fica em cache; depois de instalar o ffmpeg chame
+    is_ffmpeg_installed.cache_clear().
+    """
+    try:
+        subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return True
+    except Exception:
+        return False
+
+
+# Escolhas oferecidas na janela, na linha de comando e aceitas pela API do serviço
+QUALITIES = ('best', 'worst', '2160p', '1440p', '1080p', '720p', '480p', '360p', '240p')
+OUTPUT_FORMATS = ('mp4', 'webm', 'mkv', 'avi', 'mp3', 'wav', 'flac', 'm4a')
+REUSE_MODES = ('link', 'skip', 'off')
+
+
+def build_format_selector(quality, audio_only):
+    """Monta o seletor de formato do yt-dlp para a qualidade escolhida"""
+    if audio_only:
+        return "bestaudio/best"
+    if quality == "best":
+        # Melhor vídeo + melhor áudio, depois melhor disponível
+        return "bestvideo+bestaudio/best"
+    if quality == "worst":
+        return "worstvideo+worstaudio/worst"
+    # Exemplo: 1080p -> height<=1080
+    height = re.sub(r'\D', '', quality)
+    return f"bestvideo[height<={height}]+bestaudio/best[height<={height}]"
+
+
+# Só para transcrição: o menor stream de áudio que ainda serve para fala. O Whisper
+# reamostra tudo para 16 kHz mono, então ~32 kbps já bastam; o "?" aceita formatos
+# sem essa informação e os fallbacks garantem que algo seja baixado.
+SPEECH_AUDIO_SELECTOR = "worstaudio[abr>=?32][asr>=?16000]/worstaudio/bestaudio/worst"
+
+
+# Formatos de saída só de áudio: o vídeo nem é baixado
+AUDIO_CONTAINERS = ('mp3', 'wav', 'flac', 'm4a')
+
+# Codecs (prefixos) que cada formato de saída aceita por cópia direta, sem recodificar.
+# None aceita qualquer codec.
+CONTAINER_CODECS = {
+    'mp4': (('avc1', 'h264', 'hev1', 'hvc1', 'hevc', 'av01', 'av1', 'vp09', 'vp9'), ('mp4a', 'aac', 'mp3', 'opus')),
+    'webm': (('vp09', 'vp9', 'av01', 'av1', 'vp8'), ('opus', 'vorbis')),
+    'mkv': None,
+    'avi': (('avc1', 'h264', 'mp4v', 'mpeg4'), ('mp3', 'mp4a', 'aac')),
+    'mp3': ((), ('mp3',)),
+    'm4a': ((), ('mp4a', 'aac', 'alac')),
+    'flac': ((), ('flac',)),
+    'wav': ((), ('pcm',)),
+}
+
+# Codecs preferidos no format_sort do yt-dlp, para que a cópia direta seja possível
+CONTAINER_SORT = {
+    'mp4': ('vcodec:h264', 'acodec:aac'),
+    'webm': ('vcodec:vp9', 'acodec:opus'),
+    'avi': ('vcodec:h264', 'acodec:mp3'),
+    'mp3': ('acodec:mp3',),
+    'm4a': ('acodec:aac',),
+    'flac': ('acodec:flac',),
+}
+
+# Encoders usados quando não há como copiar os streams (último recurso)
+TRANSCODE_ARGS = {
+    'mp4': ["-c:v", "libx264", "-preset", "veryfast", "-crf", "20", "-c:a", "aac", "-b:a", "192k"],
+    'webm': ["-c:v", "libvpx-vp9", "-b:v", "0", "-crf", "32", "-row-mt", "1", "-c:a", "libopus"],
+    'mkv': ["-c:v", "libx264", "-preset", "veryfast", "-crf", "20", "-c:a", "aac", "-b:a", "192k"],
+    'avi': ["-c:v", "libx264", "-preset", "veryfast", "-crf", "20", "-c:a", "libmp3lame", "-q:a", "2"],
+    'mp3': ["-c:a", "libmp3lame", "-q:a", "2"],
+    'm4a': ["-c:a", "aac", "-b:a", "192k"],
+    'flac': ["-c:a", "flac"],
+    'wav': ["-c:a", "pcm_s16le"],
+}
+
+
+def format_sort_for(container, audio_only):
+    """format_sort do yt-dlp: resolução primeiro, depois os codecs que o formato aceita sem recodificar
+
+    A resolução vem antes para a preferência de codec nunca custar qualidade:
+    entre streams da mesma altura, ganha o que pode ser copiado.
+    """
+    preferred = CONTAINER_SORT.get(container, ())
+    if audio_only:
+        return [field for field in preferred if field.startswith('acodec')]
+    return ['res', *preferred]
+
+
+def stream_codecs(info):
+    """(vcodec, acodec) dos formatos escolhidos pelo yt-dlp, None quando não há ou é desconhecido"""
+    formats = info.get('requested_formats') or [info]
+
+    def first(key):
+        for fmt in formats:
+            codec = fmt.get(key)
+            if codec and codec != 'none':
+                return codec.lower()
+        return None
+
+    return first('vcodec'), first('acodec')
+
+
+def probe_codecs(path):
+    """(vcodec, acodec) lidos do próprio arquivo pelo ffmpeg, para quando o yt-dlp não informa"""
+    proc = subprocess.run(["ffmpeg", "-nostdin", "-hide_banner", "-i", path],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    output = proc.stderr.decode(errors='replace')
+    video = re.search(r"Stream #\S+: Video: (\w+)", output)
+    audio = re.search(r"Stream #\S+: Audio: (\w+)", output)
+    return (video.group(1) if video else None), (audio.group(1) if audio else None)
+
+
+def copy_compatible(container, vcodec, acodec):
+    """True/False se os codecs podem ser copiados para o formato; None se algum é desconhecido"""
+    codecs = CONTAINER_CODECS.get(container)
+    if codecs is None:
+        return True
+    video, audio = codecs
+    checks = []
+    if vcodec and container not in AUDIO_CONTAINERS:
+        checks.append(vcodec.startswith(video))
+    if acodec:
+        checks.append(acodec.startswith(audio))
+    if not all(checks):
+        return False
+    return True if vcodec or acodec else None
+
+
+def convert_container(path, container, vcodec=None, acodec=None):
+    """Converte o arquivo baixado para `container`, copiando os streams sempre que possível
+
+    Tenta primeiro um remux (cópia dos streams, rápido e sem perda); só
+    recodifica quando os codecs não cabem no formato ou a cópia falha.
+    Devolve (novo caminho, descrição do caminho usado).
+    """
+    if vcodec is None and acodec is None:
+        vcodec, acodec = probe_codecs(path)
+    if container in AUDIO_CONTAINERS:
+        vcodec = None  # o vídeo é descartado
+    codecs = "+".join(codec.split('.')[0] for codec in (vcodec, acodec) if codec) or "codecs desconhecidos"
+    source_ext = os.path.splitext(path)[1].lstrip('.').lower()
+    if source_ext == container:
+        return path, f"cópia direta ({codecs} → {container}), sem conversão"
+
+    target = os.path.splitext(path)[0] + "." + container
+    maps = ["-vn", "-map", "0:a:0"] if container in AUDIO_CONTAINERS else ["-map", "0:v:0?", "-map", "0:a:0?"]
+    base = ["ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-i", path, *maps]
+
+    if copy_compatible(container, vcodec, acodec) is not False:
+        proc = subprocess.run(base + ["-c", "copy", target], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if proc.returncode == 0:
+            return target, f"remux sem recodificar ({codecs}: {source_ext} → {container})"
+        reason = "a cópia dos streams falhou"
+    else:
+        reason = "codec incompatível com o formato"
+
+    proc = subprocess.run(base + TRANSCODE_ARGS.get(container, []) + [target],
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if proc.returncode != 0:
+        if os.path.exists(target):
+            os.remove(target)
+        raise RuntimeError(f"ffmpeg falhou ao converter para {container}: "
+                           f"{proc.stderr.decode(errors='replace').strip()[-300:]}")
+    return target, f"recodificação completa ({codecs}: {source_ext} → {container}; {reason})"
+
+
+def default_cache_dir():
+    """Pasta de cache do programa (respeita XDG_CACHE_HOME)"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "youtube_downloader_pro")
+
+
+@lru_cache(maxsize=1024)
+def info_cache_key(url):
+    """Chave do cache de metadados: extrator + ID do vídeo, ou hash da URL"""
+    for ie in yt_dlp.extractor.gen_extractor_classes():
+        if ie.ie_key() == 'Generic' or not ie.suitable(url):
+            continue
+        video_id = ie.get_temp_id(url)
+        if video_id:
+            return re.sub(r'[^\w.-]', '_', f"{ie.ie_key()}-{video_id}")
+        break
+    return "url-" + hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+def stream_expiry(info):
+    """Menor 'expire=' das URLs de stream do info dict (None se não houver)"""
+    expiries = []
+    for fmt in info.get('formats') or []:
+        query = parse_qs(urlparse(fmt.get('url') or '').query)
+        if query.get('expire', [''])[0].isdigit():
+            expiries.append(int(query['expire'][0]))
+    return min(expiries) if expiries else None
+
+
+class InfoCache:
+    """Cache em disco dos info dicts do yt-dlp
+
+    Cada vídeo vira um JSON (no formato de --write-info-json) chaveado pelo ID.
+    Entradas valem por `ttl` segundos ou até as URLs de stream expirarem, e os
+    arquivos mais antigos são apagados quando a pasta passa de `max_bytes`.
+    """
+
+    def __init__(self, directory=None, ttl=3600, max_bytes=256 * 1024 * 1024):
+        self.directory = directory or os.path.join(default_cache_dir(), "info")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.directory, info_cache_key(url) + ".info.json")
+
+    def get_path(self, url):
+        """Caminho do JSON em cache se ainda estiver válido, senão None"""
+        path = self._path(url)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if age > self.ttl:
+                raise ValueError("expirado")
+            with open(path, encoding='utf-8') as f:
+                info = json.load(f)
+            expiry = stream_expiry(info)
+            # Margem de 5 minutos para o download não começar com URL quase vencida
+            if expiry is not None and expiry - time.time() < 300:
+                raise ValueError("URLs de stream expiradas")
+        except (OSError, ValueError):
+            self.invalidate(url)
+            return None
+        return path
+
+    def get(self, url):
+        """Info dict em cache ou None"""
+        path = self.get_path(url)
+        if path is None:
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, url, info):
+        """Guarda o info dict de um vídeo (playlists não são guardadas)"""
+        if not info or info.get('_type', 'video') != 'video':
+            return
+        info = yt_dlp.YoutubeDL.sanitize_info(dict(info), remove_private_keys=True)
+        path = self._path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def invalidate(self, url):
+        """Remove a entrada de uma URL (ex.: URLs de stream vencidas)"""
+        try:
+            os.remove(self._path(url))
+        except OSError:
+            pass
+
+    def clear(self):
+        """Apaga todo o cache de metadados"""
+        with self._lock:
+            for name in os.listdir(self.directory):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _evict(self):
+        """Apaga os arquivos mais antigos até o cache caber em max_bytes"""
+        with self._lock:
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+
+class DownloadIndex:
+    """Índice SQLite dos arquivos já baixados, por vídeo + seleção de formato
+
+    Permite pular um vídeo que já está em disco (ou criar um hardlink dele na
+    pasta nova) em vez de baixá-lo de novo. Cada chamada abre sua própria
+    conexão em modo WAL, então várias threads e processos podem gravar ao
+    mesmo tempo; o SQLite serializa as escritas.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(default_cache_dir(), "downloads.sqlite3")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS downloads (
+                    video_key TEXT NOT NULL,
+                    selection TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    url TEXT,
+                    added_at REAL NOT NULL,
+                    PRIMARY KEY (video_key, selection, path)
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def lookup(self, video_key, selection):
+        """Caminho de uma cópia válida em disco, ou None
+
+        Registros cujo arquivo sumiu ou mudou de tamanho são apagados.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT path, name, size FROM downloads WHERE video_key = ? AND selection = ?",
+                (video_key, selection)).fetchall()
+            for path, name, size in rows:
+                if self._is_valid(path, size):
+                    return path, name
+                conn.execute("DELETE FROM downloads WHERE video_key = ? AND selection = ? AND path = ?",
+                             (video_key, selection, path))
+        return None
+
+    def record(self, video_key, selection, path, name=None, url=None):
+        """Registra um arquivo baixado (ou linkado) para o vídeo"""
+        path = os.path.abspath(path)
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO downloads VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (video_key, selection, path, name or os.path.basename(path),
+                 os.path.getsize(path), url, time.time()))
+
+    def verify(self, repair=False):
+        """Confere o índice contra o disco
+
+        Devolve (registros válidos, lista de caminhos ausentes ou alterados).
+        Com `repair`, os registros inválidos são removidos.
+        """
+        with self._connect() as conn:
+            rows = conn.execute("SELECT video_key, selection, path, size FROM downloads").fetchall()
+            broken = [(key, selection, path) for key, selection, path, size in rows
+                      if not self._is_valid(path, size)]
+            if repair and broken:
+                conn.executemany("DELETE FROM downloads WHERE video_key = ? AND selection = ? AND path = ?",
+                                 broken)
+        return len(rows) - len(broken), [path for _, _, path in broken]
+
+    @staticmethod
+    def _is_valid(path, size):
+        try:
+            return os.path.getsize(path) == size
+        except OSError:
+            return False
+
+
+def link_or_copy(source, target):
+    """Cria um hardlink de `source` em `target` (cópia se o link não for possível)"""
+    try:
+        os.link(source, target)
+        return "hardlink"
+    except OSError:
+        shutil.copy2(source, target)
+        return "cópia"
+
+
+# Falhas que costumam passar sozinhas (rede, limite de requisições, servidor fora do
+# ar); vídeo removido, privado ou 404 não melhoram tentando de novo
+TRANSIENT_ERRORS = re.compile(r"HTTP Error (403|408|429|5\d\d)|timed out|timeout|Connection (reset|refused|aborted)|"
+                              r"Remote end closed|IncompleteRead|Temporary failure in name resolution|"
+                              r"Network is unreachable|TransportError", re.IGNORECASE)
+
+
+def is_transient_error(message):
+    """Se vale a pena tentar de novo um item que falhou com `message`"""
+    return bool(message and TRANSIENT_ERRORS.search(message))
+
+
+class YdlErrorLog:
+    """logger do yt-dlp que guarda os erros para o diário, o log do job e info_download.txt
+
+    Com ignoreerrors o yt-dlp só devolve um código de retorno; o motivo da
+    falha passa por aqui. O resto sai como sem logger: nada em modo quiet.
+    """
+
+    PREFIX = re.compile(r"^(\x1b\[[0-9;]*m)*ERROR:(\x1b\[[0-9;]*m)*\s*")
+
+    def __init__(self, quiet=False):
+        self.quiet = quiet
+        self.errors = []
+
+    def debug(self, message):
+        if not self.quiet and not message.startswith("[debug] "):
+            print(message)
+
+    info = debug
+
+    def warning(self, message):
+        if not self.quiet:
+            print(message, file=sys.stderr)
+
+    def error(self, message):
+        self.errors.append(self.PREFIX.sub("", message).strip())
+        print(message, file=sys.stderr)
+
+    def last_error(self):
+        return self.errors[-1] if self.errors else "o yt-dlp reportou erro"
+
+
+def retry_delay(attempt, base=2.0, cap=60.0):
+    """Espera antes da tentativa `attempt` + 1: exponencial com jitter"""
+    delay = min(cap, base * 2 ** attempt)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class JobJournal:
+    """Diário SQLite dos jobs e do estado de cada item, para retomar após queda
+
+    Estados dos itens: queued → downloading → merged → transcribed, ou failed.
+    Jobs ficam 'running' até terminarem. Cada um guarda o processo dono (pid
+    e máquina) e um heartbeat renovado a cada HEARTBEAT segundos; um job
+    'running' cujo dono morreu ou parou de bater foi interrompido e pode ser
+    retomado na mesma pasta, onde o yt-dlp continua os arquivos .part. Jobs
+    de uma janela, lote ou serviço ainda abertos não aparecem.
+    """
+
+    DONE_STATES = ('merged', 'transcribed')  # download do item já concluído
+    HEARTBEAT = 30           # segundos entre renovações do heartbeat
+    STALE_AFTER = 3 * HEARTBEAT
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(default_cache_dir(), "journal.sqlite3")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._owner = (os.getpid(), socket.gethostname())
+        self._heartbeat = None
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    options TEXT NOT NULL,
+                    folder TEXT,
+                    status TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            # Colunas do dono do job (diários antigos não têm)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (('owner_pid', 'INTEGER'), ('owner_host', 'TEXT'), ('heartbeat', 'REAL')):
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    job_id TEXT NOT NULL,
+                    entry_index INTEGER NOT NULL,
+                    url TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    file TEXT,
+                    error TEXT,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (job_id, entry_index)
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def start_job(self, job):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO jobs (job_id, options, folder, status, updated_at, "
+                         "owner_pid, owner_host, heartbeat) VALUES (?, ?, ?, 'running', ?, ?, ?, ?)",
+                         (job.job_id, json.dumps(job.options()), job.folder, now, *self._owner, now))
+        if self._heartbeat is None:
+            self._heartbeat = threading.Thread(target=self._beat, daemon=True)
+            self._heartbeat.start()
+
+    def _beat(self):
+        """Renova o heartbeat dos jobs deste processo enquanto ele estiver vivo"""
+        while True:
+            time.sleep(self.HEARTBEAT)
+            try:
+                with self._connect() as conn:
+                    conn.execute("UPDATE jobs SET heartbeat = ? WHERE status = 'running' "
+                                 "AND owner_pid = ? AND owner_host = ?", (time.time(), *self._owner))
+            except sqlite3.Error:
+                pass  # tenta de novo na próxima; um atraso só deixa o job parecer parado
+
+    @staticmethod
+    def _process_alive(pid):
+        """Se o processo `pid` desta máquina ainda existe (no Windows, fica a cargo do heartbeat)"""
+        if sys.platform == "win32":
+            return True  # os.kill(pid, 0) encerraria o processo no Windows
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except OSError:
+            pass  # existe, mas é de outro usuário
+        return True
+
+    def _orphaned(self, owner_pid, owner_host, heartbeat):
+        """Se o dono de um job 'running' morreu ou parou de renovar o heartbeat"""
+        if owner_pid is None or heartbeat is None or time.time() - heartbeat > self.STALE_AFTER:
+            return True
+        return owner_host == self._owner[1] and not self._process_alive(owner_pid)
+
+    def finish_job(self, job_id, status):
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                         (status, time.time(), job_id))
+
+    def add_entries(self, job_id, entries):
+        """Registra os itens do job como 'queued' (itens já conhecidos não mudam)"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO entries (job_id, entry_index, url, state, updated_at) "
+                "VALUES (?, ?, ?, 'queued', ?)",
+                [(job_id, index, url, now) for index, url in entries])
+
+    def entries(self, job_id):
+        """{índice: (url, estado, arquivo)} dos itens do job"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT entry_index, url, state, file FROM entries WHERE job_id = ? "
+                                "ORDER BY entry_index", (job_id,)).fetchall()
+        return {index: (url, state, file) for index, url, state, file in rows}
+
+    def set_entry(self, job_id, index, state, file=None, error=None, only_from=None):
+        """Muda o estado de um item; com `only_from`, só se ele estiver nesse estado"""
+        sql = ("UPDATE entries SET state = ?, file = COALESCE(?, file), error = ?, updated_at = ?, "
+               "attempts = attempts + ? WHERE job_id = ? AND entry_index = ?")
+        params = [state, file, error, time.time(), 1 if state == 'downloading' else 0, job_id, index]
+        if only_from:
+            sql += " AND state = ?"
+            params.append(only_from)
+        with self._connect() as conn:
+            conn.execute(sql, params)
+
+    def unfinished_jobs(self):
+        """Jobs que ficaram 'running' sem um processo vivo cuidando deles (programa fechado no meio)"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT job_id, options, folder, owner_pid, owner_host, heartbeat FROM jobs "
+                                "WHERE status = 'running' ORDER BY updated_at").fetchall()
+        return [DownloadJob.from_options(json.loads(options), job_id=job_id, folder=folder)
+                for job_id, options, folder, *owner in rows if self._orphaned(*owner)]
+
+
+def format_rate(rate):
+    """Velocidade em bytes/s para exibição"""
+    if not rate:
+        return "sem limite"
+    if rate >= 1024 * 1024:
+        return f"{rate/1024/1024:.1f} MB/s"
+    return f"{rate/1024:.0f} KB/s"
+
+
+class BandwidthScheduler:
+    """Banda e conexões compartilhadas por todos os downloads do processo
+
+    Um token bucket limita a soma das velocidades (`rate` em bytes/s, 0 =
+    sem limite) e cada host aceita no máximo `max_per_host` conexões ao
+    mesmo tempo (0 = sem limite). Nos dois casos a prioridade maior passa
+    na frente: enquanto um job urgente espera, os outros esperam também, e
+    enquanto ele está baixando os outros ficam só com a banda que sobra.
+    """
+
+    def __init__(self, rate=0, max_per_host=0, window=3.0):
+        self.rate = rate
+        self.max_per_host = max_per_host
+        self.window = window            # janela (s) da velocidade mostrada em rates()
+        self._cond = threading.Condition()
+        self._tokens = 0.0
+        self._stamp = time.monotonic()
+        self._waiting = {}              # recurso -> {prioridade: threads esperando}
+        self._hosts = {}                # host -> conexões abertas
+        self._samples = {}              # job_id -> deque[(instante, bytes)]
+        self._last_seen = {}            # prioridade -> último consume()
+
+    def configure(self, rate=None, max_per_host=None):
+        """Muda os limites com downloads em andamento"""
+        with self._cond:
+            if rate is not None:
+                self.rate = max(0, int(rate))
+            if max_per_host is not None:
+                self.max_per_host = max(0, int(max_per_host))
+            self._cond.notify_all()
+
+    def _burst(self):
+        # No máximo meio segundo de banda acumulada, para não liberar rajadas após uma pausa
+        return max(self.rate / 2, 64 * 1024)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._burst(), self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def _wait_for(self, resource, priority, ready):
+        """Espera (com o lock) até ready() e ninguém mais prioritário na fila"""
+        waiting = self._waiting.setdefault(resource, {})
+        waiting[priority] = waiting.get(priority, 0) + 1
+        try:
+            while not (priority >= max(waiting) and ready()):
+                self._cond.wait(0.05)
+        finally:
+            waiting[priority] -= 1
+            if not waiting[priority]:
+                del waiting[priority]
+            if not waiting:
+                del self._waiting[resource]
+            self._cond.notify_all()
+
+    def consume(self, job_id, nbytes, priority=0):
+        """Registra bytes baixados e segura a thread até caberem na banda
+
+        O saldo pode ficar negativo (um bloco maior que o balde), e aí as
+        próximas chamadas esperam até ele ser pago.
+        """
+        now = time.monotonic()
+        with self._cond:
+            self._samples.setdefault(job_id, deque()).append((now, nbytes))
+            self._last_seen[priority] = now
+            if not self.rate:
+                return
+            # Com alguém mais prioritário baixando, só entra a banda que ele deixou acumular
+            busy = any(other > priority and now - seen < 1.0 for other, seen in self._last_seen.items())
+            reserve = self._burst() / 2 if busy else 0
+
+            def ready():
+                if not self.rate:
+                    return True
+                self._refill()
+                return self._tokens > reserve
+
+            self._wait_for('banda', priority, ready)
+            if self.rate:
+                self._tokens -= nbytes
+
+    def lease(self, url, count=1, priority=0):
+        """Reserva de `count` conexões com o host da URL, pega e devolvida por ConnectionLease"""
+        return ConnectionLease(self, (urlparse(url).hostname or '').lower(), count, priority)
+
+    def _acquire_host(self, host, count, priority):
+        def ready():
+            active = self._hosts.get(host, 0)
+            # Um download sozinho sempre passa, mesmo pedindo mais que o limite
+            return not self.max_per_host or not active or active + count <= self.max_per_host
+
+        with self._cond:
+            self._wait_for(('host', host), priority, ready)
+            self._hosts[host] = self._hosts.get(host, 0) + count
+
+    def _release_host(self, host, count):
+        with self._cond:
+            self._hosts[host] -= count
+            if not self._hosts[host]:
+                del self._hosts[host]
+            self._cond.notify_all()
+
+    def rates(self):
+        """Velocidade recente em bytes/s: ({job_id: velocidade}, total)"""
+        cutoff = time.monotonic() - self.window
+        rates = {}
+        with self._cond:
+            for job_id, samples in list(self._samples.items()):
+                while samples and samples[0][0] < cutoff:
+                    samples.popleft()
+                if samples:
+                    rates[job_id] = sum(nbytes for _, nbytes in samples) / self.window
+                else:
+                    del self._samples[job_id]
+        return rates, sum(rates.values())
+
+
+class ConnectionLease:
+    """Conexões de um item com o host, presas só enquanto os streams baixam
+
+    hold() roda como pós-processador 'before_dl' (formatos já escolhidos,
+    transferência prestes a começar) e a reserva volta quando o último
+    stream termina, antes do merge, da conversão e da fila de transcrição.
+    O yt-dlp não avisa quando uma transferência falha: nesse caso quem
+    devolve é o finally de quem criou a reserva (release() é idempotente).
+    """
+
+    def __init__(self, scheduler, host, count, priority):
+        self.scheduler = scheduler
+        self.host = host
+        self.count = count
+        self.priority = priority
+        self._held = False
+        self._streams = 0
+        self._lock = threading.Lock()
+
+    def hold(self, info):
+        streams = len(info.get('requested_formats') or ()) or 1
+        with self._lock:
+            if self._held:
+                self._streams = streams
+                return
+        self.scheduler._acquire_host(self.host, self.count, self.priority)
+        with self._lock:
+            self._held = True
+            self._streams = streams
+
+    def progress_hook(self, d):
+        if d['status'] == 'finished':
+            with self._lock:
+                self._streams -= 1
+                done = self._streams <= 0
+            if done:
+                self.release()
+
+    def release(self):
+        with self._lock:
+            if not self._held:
+                return
+            self._held = False
+        self.scheduler._release_host(self.host, self.count)
+
+
+_scheduler = BandwidthScheduler()
+
+
+def shared_scheduler():
+    """Agendador de banda único do processo, usado por padrão em todo DownloadEngine"""
+    return _scheduler
+
+
+class StageMetrics:
+    """Contadores de tempo e bytes por etapa (extração, download, merge, transcrição...)
+
+    Cada registro também vai para `parent`, então os contadores de um job
+    somam nos do processo. Os tempos são somados por etapa: com downloads
+    em paralelo, o tempo de download pode passar do tempo total do job.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds=0.0, nbytes=0, count=1):
+        with self._lock:
+            entry = self._stages.setdefault(stage, {'count': 0, 'seconds': 0.0, 'bytes': 0})
+            entry['count'] += count
+            entry['seconds'] += seconds
+            entry['bytes'] += nbytes
+        if self.parent is not None:
+            self.parent.add(stage, seconds, nbytes, count)
+
+    @contextmanager
+    def stage(self, name):
+        """Mede o tempo do bloco como uma ocorrência da etapa `name`"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def snapshot(self):
+        """{etapa: {'count', 'seconds', 'bytes'}} no momento da chamada"""
+        with self._lock:
+            return {stage: dict(entry) for stage, entry in self._stages.items()}
+
+
+_metrics = StageMetrics()
+
+
+def metrics_snapshot():
+    """Contadores por etapa somando tudo o que este processo já fez"""
+    return _metrics.snapshot()
+
+
+def format_stages(stages):
+    """Resumo de uma linha dos contadores por etapa, para o log"""
+    parts = []
+    for stage, entry in sorted(stages.items(), key=lambda item: -item[1]['seconds']):
+        size = f" {entry['bytes'] / 1024 / 1024:.1f} MB" if entry['bytes'] else ""
+        parts.append(f"{stage} {entry['seconds']:.1f}s{size}")
+    return " | ".join(parts)
+
+
+class _ContainerConvert(yt_dlp.postprocessor.PostProcessor):
+    """Leva o arquivo final ao formato pedido, por cópia de streams sempre que der"""
+
+    def __init__(self, container, log):
+        super().__init__()
+        self.container = container
+        self.log = log
+
+    def run(self, info):
+        source = info['filepath']
+        vcodec, acodec = stream_codecs(info)
+        target, method = convert_container(source, self.container, vcodec, acodec)
+        self.log(method)
+        if target == source:
+            return [], info
+        info['filepath'] = target
+        info['ext'] = self.container
+        # O yt-dlp apaga o original
+        return [source], info
+
+
+class _InfoCapture(yt_dlp.postprocessor.PostProcessor):
+    """Pós-processador que só repassa o info dict a um callback (ex.: em 'pre_process', logo após a extração)"""
+
+    def __init__(self, callback):
+        super().__init__()
+        self.callback = callback
+
+    def run(self, info):
+        self.callback(info)
+        return [], info
+
+
+# Etapas dos pós-processadores do yt-dlp, pelo nome que ele informa nos hooks (os
+# demais viram "pp:<nome>"); o _InfoCapture já entra na etapa 'extract'
+POSTPROCESSOR_STAGES = {'Merger': 'merge', _ContainerConvert.pp_key(): 'convert', _InfoCapture.pp_key(): None}
+
+
+# Formato que o Whisper espera: PCM mono 16 kHz
+WHISPER_SAMPLE_RATE = 16000
+
+WHISPER_MODELS = ('tiny', 'base', 'small', 'medium', 'large')
+
+# Motores já carregados neste processo (cada worker de transcrição tem os seus), por
+# TranscriberSpec. Guarda poucos porque cada modelo ocupa de centenas de MB a alguns GB.
+_transcribers = {}
+_transcribers_lock = threading.Lock()
+MAX_LOADED_MODELS = 2
+
+
+def transcript_filename(media_path, per_file=False):
+    """Nome do arquivo de transcrição (um por mídia em playlists)"""
+    if not per_file:
+        return "transcricao.txt"
+    return os.path.splitext(os.path.basename(media_path))[0] + ".transcricao.txt"
+
+
+def write_transcript(result, media_path, transcript_file):
+    """Salva o resultado do Whisper no formato de transcricao.txt"""
+    with open(transcript_file, 'w', encoding='utf-8') as f:
+        f.write("=" * 50 + "\n")
+        f.write("TRANSCRIÇÃO AUTOMÁTICA\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(f"Arquivo: {os.path.basename(media_path)}\n")
+        f.write(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
+        f.write(f"Idioma detectado: {result.get('language', 'português')}\n")
+        f.write("\n" + "=" * 50 + "\n")
+        f.write("TEXTO COMPLETO:\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(result["text"])
+        f.write("\n\n" + "=" * 50 + "\n")
+        f.write("SEGMENTOS COM TIMESTAMPS:\n")
+        f.write("=" * 50 + "\n\n")
+
+        for segment in result["segments"]:
+            start_time = segment["start"]
+            end_time = segment["end"]
+            text = segment["text"]
+
+            start_str = f"{int(start_time//60):02d}:{int(start_time%60):02d}"
+            end_str = f"{int(end_time//60):02d}:{int(end_time%60):02d}"
+
+            f.write(f"[{start_str} - {end_str}] {text}\n")
+
+
+def stream_pcm(media_path, sample_rate=WHISPER_SAMPLE_RATE, start=None, duration=None):
+    """Gera blocos de PCM s16le mono lidos do stdout do ffmpeg
+
+    Vídeos funcionam igual a áudios (-vn) e nada é escrito em disco.
+    `start`/`duration` (segundos) decodificam só um trecho.
+    """
+    cmd = ["ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0"]
+    if start:
+        cmd += ["-ss", f"{start:.3f}"]
+    cmd += ["-i", media_path]
+    if duration is not None:
+        cmd += ["-t", f"{duration:.3f}"]
+    cmd += ["-vn", "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-"]
+    # stderr vai para um arquivo: num pipe que ninguém lê, um arquivo corrompido enche o
+    # buffer de erros e o ffmpeg trava esperando enquanto esperamos o stdout
+    with tempfile.TemporaryFile() as errors:
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errors) as proc:
+            while True:
+                chunk = proc.stdout.read(1 << 20)
+                if not chunk:
+                    break
+                yield chunk
+        if proc.returncode != 0:
+            errors.seek(max(0, errors.seek(0, os.SEEK_END) - 4096))
+            stderr = errors.read().decode(errors='replace').strip()
+            raise RuntimeError(f"ffmpeg falhou ao extrair o áudio: {stderr}")
+
+
+def pcm_to_float(pcm):
+    """Converte PCM s16le no array float32 que o Whisper recebe"""
+    import numpy as np
+
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+
+def _timestamp(seconds, separator):
+    """HH:MM:SS,mmm (SRT) ou HH:MM:SS.mmm (VTT)"""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def write_srt(result, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for index, segment in enumerate(result["segments"], start=1):
+            f.write(f"{index}\n{_timestamp(segment['start'], ',')} --> {_timestamp(segment['end'], ',')}\n")
+            f.write(f"{segment['text'].strip()}\n\n")
+
+
+def write_vtt(result, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("WEBVTT\n\n")
+        for segment in result["segments"]:
+            f.write(f"{_timestamp(segment['start'], '.')} --> {_timestamp(segment['end'], '.')}\n")
+            f.write(f"{segment['text'].strip()}\n\n")
+
+
+def write_json(result, media_path, path):
+    """JSON com texto e segmentos, escrito um segmento por vez"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("{\n")
+        f.write(f'  "file": {json.dumps(os.path.basename(media_path), ensure_ascii=False)},\n')
+        f.write(f'  "language": {json.dumps(result.get("language"))},\n')
+        f.write(f'  "text": {json.dumps(result["text"], ensure_ascii=False)},\n')
+        f.write('  "segments": [')
+        for index, segment in enumerate(result["segments"]):
+            item = {'start': segment['start'], 'end': segment['end'], 'text': segment['text']}
+            f.write(("," if index else "") + "\n    " + json.dumps(item, ensure_ascii=False))
+        f.write("\n  ]\n}\n")
+
+
+TRANSCRIPT_WRITERS = {
+    'srt': lambda result, media_path, path: write_srt(result, path),
+    'vtt': lambda result, media_path, path: write_vtt(result, path),
+    'json': write_json,
+}
+
+
+def write_transcript_files(result, media_path, transcript_file, formats=()):
+    """Salva transcricao.txt e, ao lado dele, os formatos extras pedidos"""
+    write_transcript(result, media_path, transcript_file)
+    base = os.path.splitext(transcript_file)[0]
+    for fmt in formats:
+        if fmt in TRANSCRIPT_WRITERS:
+            TRANSCRIPT_WRITERS[fmt](result, media_path, f"{base}.{fmt}")
+
+
+def load_audio_pcm(media_path, sample_rate=WHISPER_SAMPLE_RATE, start=None, duration=None):
+    """Decodifica o áudio de qualquer mídia para um array float32 mono em memória"""
+    pcm = bytearray()
+    for chunk in stream_pcm(media_path, sample_rate, start, duration):
+        pcm += chunk
+    return pcm_to_float(pcm)
+
+
+def transcript_cache_key(pcm_hash, model_tag, language):
+    """Chave do cache de transcrições: conteúdo do áudio + motor/modelo + idioma"""
+    return hashlib.sha256(f"{pcm_hash}|{model_tag}|{language}".encode('utf-8')).hexdigest()
+
+
+def hash_audio(media_path):
+    """sha256 do áudio decodificado, sem manter o áudio em memória"""
+    digest = hashlib.sha256()
+    for chunk in stream_pcm(media_path):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TranscriptCache:
+    """Transcrições já feitas, guardadas em JSON por hash do áudio decodificado
+
+    Como a chave é o conteúdo (e não o caminho), o mesmo áudio baixado de novo
+    em outra pasta video_{timestamp} reaproveita a transcrição. É seguro usar a
+    mesma pasta a partir de vários processos: cada entrada é gravada num
+    arquivo temporário e renomeada.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.path.join(default_cache_dir(), "transcripts")
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, result):
+        data = {
+            'text': result['text'],
+            'language': result.get('language'),
+            'segments': [{'start': seg['start'], 'end': seg['end'], 'text': seg['text']}
+                         for seg in result['segments']],
+        }
+        # Processos do pool e threads de transcrição em trechos gravam ao mesmo tempo
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(key))
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+
+def detect_silences(media_path, noise_db=-35, min_silence=0.5):
+    """Duração da mídia e intervalos de silêncio [(início, fim), ...] via silencedetect
+
+    É uma passada só de decodificação de áudio, bem mais rápida que o Whisper.
+    """
+    cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-i", media_path, "-vn",
+           "-af", f"silencedetect=noise={noise_db}dB:d={min_silence}", "-f", "null", "-"]
+    proc = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    output = proc.stderr.decode(errors='replace')
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg falhou ao analisar o áudio: {output.strip()[-300:]}")
+
+    duration = 0.0
+    match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", output)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    # O "time=" final do progresso é mais confiável que o cabeçalho em alguns contêineres
+    times = re.findall(r"time=(\d+):(\d+):(\d+(?:\.\d+)?)", output)
+    if times:
+        hours, minutes, seconds = times[-1]
+        duration = max(duration, int(hours) * 3600 + int(minutes) * 60 + float(seconds))
+
+    starts = [float(x) for x in re.findall(r"silence_start: (-?\d+(?:\.\d+)?)", output)]
+    ends = [float(x) for x in re.findall(r"silence_end: (\d+(?:\.\d+)?)", output)]
+    silences = [(max(0.0, start), end) for start, end in zip(starts, ends)]
+    return duration, silences
+
+
+def plan_chunks(duration, silences, chunk_seconds=600, overlap=2.0):
+    """Divide a mídia em trechos de ~chunk_seconds cortando no meio de silêncios
+
+    Devolve [(início, fim, corte_inicial, corte_final), ...]. Cada trecho é
+    decodificado de início a fim (com até `overlap` segundos a mais de cada
+    lado para dar contexto ao Whisper), mas só os segmentos entre os dois
+    cortes entram no resultado final. A sobreposição nunca passa da metade do
+    silêncio do corte (e é zero em corte sem silêncio), então a fala de uma
+    emenda cai em um trecho só e não sai duplicada.
+    """
+    cuts = [(0.0, 0.0)]                       # (posição, folga de cada lado)
+    while duration - cuts[-1][0] > chunk_seconds * 1.25:
+        target = cuts[-1][0] + chunk_seconds
+        window = chunk_seconds * 0.2
+        candidates = [(start, end) for start, end in silences if abs((start + end) / 2 - target) <= window]
+        if candidates:
+            start, end = min(candidates, key=lambda silence: abs((silence[0] + silence[1]) / 2 - target))
+            cuts.append(((start + end) / 2, min(overlap, (end - start) / 2)))
+        else:
+            cuts.append((target, 0.0))
+    cuts.append((duration, 0.0))
+
+    return [(max(0.0, cut_start - pad_start), min(duration, cut_end + pad_end), cut_start, cut_end)
+            for (cut_start, pad_start), (cut_end, pad_end) in zip(cuts, cuts[1:])]
+
+
+def stitch_segments(chunk_results):
+    """Junta os resultados dos trechos (já em ordem) num único resultado do Whisper"""
+    segments = []
+    for chunk in chunk_results:
+        segments.extend(chunk['segments'])
+    for index, segment in enumerate(segments):
+        segment['id'] = index
+    language = next((chunk['language'] for chunk in chunk_results if chunk.get('language')), None)
+    return {
+        'text': "".join(segment['text'] for segment in segments),
+        'segments': segments,
+        'language': language,
+    }
+
+
+@dataclass(frozen=True)
+class TranscriberSpec:
+    """Qual motor de transcrição usar e como (serializável para os processos do pool)"""
+    backend: str = "whisper"        # chave de TRANSCRIBER_BACKENDS
+    model_name: str = "base"        # ver WHISPER_MODELS
+    threads: int = 0                # threads de CPU por processo (0 = padrão do motor)
+    batch_size: int = 8             # faster-whisper: trechos de 30s decodificados juntos
+    compute_type: str = "int8"      # faster-whisper: quantização dos pesos
+
+    def load(self):
+        return TRANSCRIBER_BACKENDS[self.backend](self)
+
+    @property
+    def cache_tag(self):
+        """Parte da chave do cache de transcrições (o openai-whisper mantém a chave antiga)"""
+        if self.backend == "whisper":
+            return self.model_name
+        return f"{self.backend}/{self.model_name}/{self.compute_type}"
+
+
+class TranscriberBackend:
+    """Interface dos motores de transcrição
+
+    transcribe() recebe o áudio float32 mono de 16 kHz e devolve sempre o
+    mesmo formato: {'text', 'language', 'segments': [{'id', 'start', 'end',
+    'text'}, ...]}, então writers, cache e costura de trechos não dependem
+    do motor.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+
+    def transcribe(self, audio, language=None):
+        raise NotImplementedError
+
+    @staticmethod
+    def result(segments, language):
+        """Monta o resultado padrão a partir de (início, fim, texto)"""
+        segments = [{'id': index, 'start': float(start), 'end': float(end), 'text': text}
+                    for index, (start, end, text) in enumerate(segments)]
+        return {'text': "".join(segment['text'] for segment in segments),
+                'segments': segments, 'language': language}
+
+
+class OpenAIWhisperBackend(TranscriberBackend):
+    """openai-whisper: PyTorch em fp32 na CPU (o motor original do programa)"""
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        whisper = import_whisper()
+        if spec.threads:
+            import torch
+            torch.set_num_threads(spec.threads)
+        self.model = whisper.load_model(spec.model_name)
+
+    def transcribe(self, audio, language=None):
+        result = self.model.transcribe(audio, language=language)
+        return self.result(((segment['start'], segment['end'], segment['text'])
+                            for segment in result['segments']), result.get('language'))
+
+
+class FasterWhisperBackend(TranscriberBackend):
+    """faster-whisper: CTranslate2 com pesos quantizados em int8 e inferência em lote
+
+    Com batch_size > 1, o áudio é dividido pelo VAD e vários trechos de 30s
+    passam pelo modelo de uma vez, o que aproveita melhor os núcleos da CPU.
+    """
+
+    def __init__(self, spec):
+        super().__init__(spec)
+        faster_whisper = import_faster_whisper()
+        # "large" no openai-whisper é o large mais recente
+        model_name = "large-v3" if spec.model_name == "large" else spec.model_name
+        self.model = faster_whisper.WhisperModel(model_name, device="cpu", compute_type=spec.compute_type,
+                                                 cpu_threads=spec.threads)
+        self.pipeline = None
+        if spec.batch_size > 1 and hasattr(faster_whisper, "BatchedInferencePipeline"):
+            self.pipeline = faster_whisper.BatchedInferencePipeline(model=self.model)
+
+    def transcribe(self, audio, language=None):
+        if self.pipeline is not None:
+            segments, info = self.pipeline.transcribe(audio, language=language, batch_size=self.spec.batch_size)
+        else:
+            segments, info = self.model.transcribe(audio, language=language)
+        # segments é um gerador: a transcrição acontece enquanto ele é consumido
+        return self.result(((segment.start, segment.end, segment.text) for segment in segments),
+                           info.language)
+
+
+TRANSCRIBER_BACKENDS = {
+    'whisper': OpenAIWhisperBackend,
+    'faster-whisper': FasterWhisperBackend,
+}
+
+
+def _load_transcriber(spec):
+    """Motor de transcrição do processo atual, carregado só uma vez por spec
+
+    Devolve (motor, segundos gastos carregando) — 0 quando já estava em memória.
+    """
+    with _transcribers_lock:
+        transcriber = _transcribers.pop(spec, None)
+        load_seconds = 0.0
+        if transcriber is None:
+            started = time.perf_counter()
+            transcriber = spec.load()
+            load_seconds = time.perf_counter() - started
+        # Reinsere no fim para o dict ficar em ordem de uso (LRU)
+        _transcribers[spec] = transcriber
+        while len(_transcribers) > MAX_LOADED_MODELS:
+            _transcribers.pop(next(iter(_transcribers)))
+        return transcriber, load_seconds
+
+
+def preload_transcriber(spec):
+    """Tarefa do pool: deixa o modelo carregado antes do primeiro arquivo chegar"""
+    return _load_transcriber(spec)[1]
+
+
+def transcribe_chunk(media_path, chunk, spec=TranscriberSpec(), language="pt"):
+    """Transcreve um trecho (ver plan_chunks) e devolve segmentos em tempo global
+
+    Só ficam os segmentos cujo meio cai entre os cortes do trecho, aparados
+    nos cortes; o que estiver na sobreposição pertence ao trecho vizinho.
+    """
+    start, end, cut_start, cut_end = chunk
+    transcriber, _ = _load_transcriber(spec)
+    result = transcriber.transcribe(load_audio_pcm(media_path, start=start, duration=end - start),
+                                    language=language)
+    segments = []
+    for segment in result['segments']:
+        segment_start, segment_end = segment['start'] + start, segment['end'] + start
+        if cut_start <= (segment_start + segment_end) / 2 < cut_end:
+            segments.append(dict(segment, start=max(segment_start, cut_start), end=min(segment_end, cut_end)))
+    return {'segments': segments, 'language': result.get('language')}
+
+
+def transcribe_media(media_path, transcript_file, spec=TranscriberSpec(), language="pt",
+                     formats=(), cache_dir=None):
+    """Transcreve um arquivo no processo atual e salva a transcrição
+
+    Roda dentro dos processos de TranscriptionPipeline, por isso devolve um
+    dict simples (serializável) em vez de levantar exceções. Com `cache_dir`,
+    um áudio já transcrito antes é servido do cache sem carregar o Whisper.
+    """
+    try:
+        started = time.perf_counter()
+        pcm = bytearray()
+        for chunk in stream_pcm(media_path):
+            pcm += chunk
+        decode_seconds = time.perf_counter() - started
+
+        cache = TranscriptCache(cache_dir) if cache_dir else None
+        key = transcript_cache_key(hashlib.sha256(pcm).hexdigest(), spec.cache_tag, language)
+        result = cache.get(key) if cache else None
+        cached = result is not None
+        load_seconds = transcribe_seconds = 0.0
+        if not cached:
+            transcriber, load_seconds = _load_transcriber(spec)
+            started = time.perf_counter()
+            result = transcriber.transcribe(pcm_to_float(pcm), language=language)
+            transcribe_seconds = time.perf_counter() - started
+            if cache:
+                cache.put(key, result)
+
+        write_transcript_files(result, media_path, transcript_file, formats)
+        return {'media': media_path, 'transcript': transcript_file, 'error': None, 'cached': cached,
+                'load_seconds': load_seconds, 'transcribe_seconds': transcribe_seconds,
+                'decode_seconds': decode_seconds, 'audio_bytes': len(pcm)}
+    except Exception as e:
+        return {'media': media_path, 'transcript': None, 'error': str(e)}
+
+
+def peak_rss_mb():
+    """Pico de memória residente do processo atual em MB (None onde não há como medir)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em bytes no macOS e em KB no Linux
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def benchmark_transcriber(spec, media_path, language="pt"):
+    """Mede carga, velocidade e memória de um motor (rodar num processo novo)"""
+    audio = load_audio_pcm(media_path)
+    transcriber, load_seconds = _load_transcriber(spec)
+    started = time.perf_counter()
+    result = transcriber.transcribe(audio, language=language)
+    transcribe_seconds = time.perf_counter() - started
+    return {
+        'backend': spec.backend,
+        'load_seconds': load_seconds,
+        'transcribe_seconds': transcribe_seconds,
+        'audio_seconds': len(audio) / WHISPER_SAMPLE_RATE,
+        'peak_rss_mb': peak_rss_mb(),
+        'segments': len(result['segments']),
+        'text': result['text'],
+    }
+
+
+class TranscriptionPipeline:
+    """Fila limitada de transcrições atendida por um pool de processos
+
+    Os processos separados deixam o Whisper usar a CPU sem disputar o GIL com
+    as threads de download. submit() bloqueia quando já há `max_pending`
+    arquivos esperando, o que segura o produtor em vez de acumular memória.
+    """
+
+    def __init__(self, workers=1, max_pending=None, spec=TranscriberSpec(), language="pt", cache_dir=None,
+                 use_cache=True):
+        self.spec = spec
+        self.language = language
+        self.cache_dir = (cache_dir or TranscriptCache().directory) if use_cache else None
+        self.workers = workers
+        self._preloaded = set()
+        self._slots = threading.BoundedSemaphore(max_pending or workers * 2)
+        self._executor_lock = threading.Lock()
+        self._executor = self._new_executor()
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def _submit(self, fn, *args):
+        """Envia uma tarefa ao pool, recriando-o se um processo tiver morrido
+
+        Se um processo morre (ex.: falta de memória ao carregar o modelo), o
+        ProcessPoolExecutor fica quebrado para sempre; as tarefas que estavam
+        nele falham, mas as próximas vão para um pool novo.
+        """
+        with self._executor_lock:
+            executor = self._executor
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            with self._executor_lock:
+                if self._executor is executor:
+                    self._executor = self._new_executor()
+                    # Os processos novos ainda não carregaram modelo nenhum
+                    self._preloaded.clear()
+                executor = self._executor
+            return executor.submit(fn, *args)
+
+    def preload(self, spec=None):
+        """Carrega o modelo nos processos em segundo plano (uma vez por spec)
+
+        Feito no começo do job, o import do torch e a carga do modelo
+        acontecem enquanto o download ainda está rodando.
+        """
+        spec = spec or self.spec
+        if spec in self._preloaded:
+            return []
+        self._preloaded.add(spec)
+        return [self._submit(preload_transcriber, spec) for _ in range(self.workers)]
+
+    def submit(self, media_path, transcript_file, chunk_seconds=None, formats=(), spec=None):
+        """Enfileira um arquivo e devolve o Future com o dict de resultado
+
+        Com `chunk_seconds`, mídias mais longas que isso são divididas em
+        trechos transcritos em paralelo pelos processos do pool. `formats`
+        lista as saídas extras ('srt', 'vtt', 'json') além do .txt.
+        """
+        spec = spec or self.spec
+        self._slots.acquire()
+        try:
+            if chunk_seconds:
+                future = Future()
+                threading.Thread(target=self._run_chunked, daemon=True,
+                                 args=(future, media_path, transcript_file, chunk_seconds, formats,
+                                       spec)).start()
+            else:
+                future = self._submit(transcribe_media, media_path, transcript_file,
+                                      spec, self.language, formats, self.cache_dir)
+        except Exception:
+            self._slots.release()
+            raise
+        future.media_path = media_path
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _run_chunked(self, future, media_path, transcript_file, chunk_seconds, formats, spec):
+        """Divide a mídia nos silêncios, transcreve os trechos no pool e costura"""
+        try:
+            cache = TranscriptCache(self.cache_dir) if self.cache_dir else None
+            key = transcript_cache_key(hash_audio(media_path), spec.cache_tag, self.language) if cache else None
+            result = cache.get(key) if cache else None
+            if result is not None:
+                write_transcript_files(result, media_path, transcript_file, formats)
+                future.set_result({'media': media_path, 'transcript': transcript_file, 'error': None,
+                                   'cached': True})
+                return
+
+            started = time.perf_counter()
+            duration, silences = detect_silences(media_path)
+            chunks = plan_chunks(duration, silences, chunk_seconds)
+            parts = [self._submit(transcribe_chunk, media_path, chunk, spec, self.language)
+                     for chunk in chunks]
+            result = stitch_segments([part.result() for part in parts])
+            if cache:
+                cache.put(key, result)
+            write_transcript_files(result, media_path, transcript_file, formats)
+            future.set_result({'media': media_path, 'transcript': transcript_file, 'error': None,
+                               'chunks': len(chunks), 'transcribe_seconds': time.perf_counter() - started,
+                               'audio_bytes': int(duration * WHISPER_SAMPLE_RATE) * 2})
+        except Exception as e:
+            future.set_result({'media': media_path, 'transcript': None, 'error': str(e)})
+
+    def shutdown(self, wait=True):
+        with self._executor_lock:
+            executor = self._executor
+        executor.shutdown(wait=wait)
+
+
+def future_result(future):
+    """Resultado de um Future do pipeline, convertendo falhas do pool em erro"""
+    try:
+        return future.result()
+    except Exception as e:
+        media = getattr(future, 'media_path', '')
+        return {'media': media, 'transcript': None, 'error': str(e) or type(e).__name__}
+
+
+class MessageTail:
+    """Últimas `maxlen` mensagens de um job, numeradas desde o início
+
+    Os clientes do serviço pedem "a partir da N-ésima"; as mais antigas que
+    isso já saíram da memória e ficam só no job.log.
+    """
+
+    def __init__(self, maxlen=500):
+        self._messages = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.total = 0  # mensagens recebidas desde o início
+
+    def append(self, message):
+        with self._lock:
+            self._messages.append(message)
+            self.total += 1
+
+    def since(self, index):
+        """(mensagens a partir de `index`, índice da próxima)"""
+        with self._lock:
+            first = self.total - len(self._messages)
+            return list(self._messages)[max(0, index - first):], self.total
+
+
+class JobLog:
+    """Histórico completo de um job num arquivo com rotação
+
+    As mensagens passam por um MemoryHandler e só vão para o disco a cada
+    `capacity` linhas (ou imediatamente em caso de erro), então o log em
+    disco não custa uma escrita por mensagem.
+    """
+
+    def __init__(self, path, max_bytes=5 * 1024 * 1024, backups=3, capacity=200):
+        self.path = path
+        self._file = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups,
+                                         encoding='utf-8', delay=True)
+        self._file.setFormatter(logging.Formatter("[%(asctime)s] %(message)s", "%Y-%m-%d %H:%M:%S"))
+        self._buffer = MemoryHandler(capacity, flushLevel=logging.ERROR, target=self._file)
+
+    def write(self, message):
+        level = logging.ERROR if message.lstrip().startswith("❌") else logging.INFO
+        self._buffer.handle(logging.makeLogRecord({'msg': message, 'levelno': level,
+                                                   'levelname': logging.getLevelName(level)}))
+
+    def close(self):
+        self._buffer.close()
+        self._file.close()
+
+
+@dataclass
+class DownloadJob:
+    """Opções e resultado de um download, sem depender da interface gráfica"""
+    url: str
+    download_path: str
+    quality: str = "best"
+    format_ext: str = "mp4"
+    audio_only: bool = False
+    transcribe: bool = False
+    playlist: bool = False
+    playlist_workers: int = 4       # vídeos da playlist baixados ao mesmo tempo
+    fragments: int = 4              # fragmentos DASH/HLS simultâneos por vídeo
+    chunk_minutes: int = 0          # >0: áudios longos são transcritos em trechos paralelos
+    transcript_formats: tuple = ()  # saídas extras da transcrição: 'srt', 'vtt', 'json'
+    model_name: str = "base"        # modelo Whisper (ver WHISPER_MODELS)
+    backend: str = "whisper"        # motor de transcrição (ver TRANSCRIBER_BACKENDS)
+    transcribe_threads: int = 0     # threads de CPU por processo de transcrição (0 = padrão)
+    transcribe_batch: int = 8       # faster-whisper: trechos transcritos em lote
+    reuse: str = "link"             # vídeo já baixado: 'link' (hardlink), 'skip' ou 'off' (baixa de novo)
+    retries: int = 3                # novas tentativas por item antes de desistir
+    transcript_only: bool = False   # baixa só o menor áudio útil e transcreve
+    keep_media: bool = False        # com transcript_only, mantém o áudio depois de transcrever
+    priority: int = 0               # maior passa na frente na fila, na banda e nas conexões
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # Preenchidos durante a execução
+    status: str = "pendente"
+    folder: str = None
+    error: str = None
+    transcripts: list = field(default_factory=list)
+    transcriptions: list = field(default_factory=list)  # resultados por arquivo
+    started_at: float = 0.0
+    log: JobLog = None
+    failed_entries: list = field(default_factory=list)  # [(índice, url, erro), ...]
+    first_transcript_seconds: float = None
+    progress: dict = field(default_factory=dict)   # stream -> (status, baixado, total, velocidade)
+    messages: MessageTail = None                   # últimas mensagens, só para a API do serviço
+    metrics: StageMetrics = None                   # tempo e bytes por etapa (metrics.json)
+
+    # Campos que descrevem o pedido (o resto é estado da execução)
+    OPTION_FIELDS = ('url', 'download_path', 'quality', 'format_ext', 'audio_only', 'transcribe',
+                     'playlist', 'playlist_workers', 'fragments', 'chunk_minutes',
+                     'transcript_formats', 'model_name', 'backend', 'transcribe_threads',
+                     'transcribe_batch', 'reuse', 'retries', 'priority', 'transcript_only', 'keep_media')
+
+    def __post_init__(self):
+        if self.transcript_only:
+            self.transcribe = True
+
+    def transcriber(self):
+        """TranscriberSpec com o motor e o modelo escolhidos para o job"""
+        return TranscriberSpec(self.backend, self.model_name, self.transcribe_threads, self.transcribe_batch)
+
+    @property
+    def discard_media(self):
+        """O arquivo baixado só existe para a transcrição e é apagado depois dela"""
+        return self.transcript_only and not self.keep_media
+
+    def options(self):
+        """Opções do job num dict serializável em JSON"""
+        options = {name: getattr(self, name) for name in self.OPTION_FIELDS}
+        options['transcript_formats'] = list(self.transcript_formats)
+        return options
+
+    @classmethod
+    def from_options(cls, options, **extra):
+        """Recria um job a partir de options() (campos desconhecidos são ignorados)"""
+        known = {name: value for name, value in options.items() if name in cls.OPTION_FIELDS}
+        known['transcript_formats'] = tuple(known.get('transcript_formats', ()))
+        return cls(**known, **extra)
+
+
+class DownloadEngine:
+    """Executa jobs de download (e transcrição) sem usar Tk
+
+    Os jobs são distribuídos entre um número fixo de workers, então vários
+    URLs podem ser baixados ao mesmo tempo. Mensagens de log e progresso são
+    repassadas para os callbacks informados, que podem ser a GUI ou o terminal.
+    """
+
+    def __init__(self, workers=1, log=print, progress_hook=None, quiet=False, info_cache=None,
+                 transcribe_workers=1, transcript_cache=True, download_index=None, journal=None,
+                 scheduler=None, metrics=None):
+        self.workers = max(1, int(workers))
+        self.log = log
+        self.progress_hook = progress_hook
+        self.quiet = quiet
+        self.info_cache = info_cache if info_cache is not None else InfoCache()
+        self.download_index = download_index if download_index is not None else DownloadIndex()
+        self.journal = journal if journal is not None else JobJournal()
+        self.scheduler = scheduler if scheduler is not None else shared_scheduler()
+        self.metrics = metrics if metrics is not None else _metrics
+
+        # Transcrição roda em processos separados, criados sob demanda
+        self.transcribe_workers = max(1, int(transcribe_workers))
+        self.transcript_cache = transcript_cache
+        self._pipeline = None
+        self._pipeline_lock = threading.Lock()
+        self._folder_lock = threading.Lock()
+
+    def create_job_folder(self, job):
+        """Cria a pasta video_{timestamp} do job sem colidir com outros workers"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        base = os.path.join(job.download_path, f"video_{timestamp}")
+        with self._folder_lock:
+            folder = base
+            suffix = 2
+            while os.path.exists(folder):
+                folder = f"{base}_{suffix}"
+                suffix += 1
+            os.makedirs(folder)
+        return folder
+
+    def build_ydl_opts(self, job, video_folder):
+        """Configurações do yt-dlp para o job"""
+        # Formatos de áudio (mp3, wav...) só baixam o áudio
+        audio_only = job.audio_only or job.format_ext in AUDIO_CONTAINERS
+        ydl_opts = {
+            'format': SPEECH_AUDIO_SELECTOR if job.transcript_only else build_format_selector(job.quality, audio_only),
+            # Entre streams da mesma resolução, os que o formato aceita sem recodificar
+            'format_sort': [] if job.transcript_only else format_sort_for(job.format_ext, audio_only),
+            'outtmpl': os.path.join(video_folder, "%(title)s.%(ext)s"),
+            'progress_hooks': [self.throttle_hook(job), self.track_progress(job)]
+                              + ([self.progress_hook] if self.progress_hook else []),
+            'postprocessor_hooks': [self.track_postprocessing(job)],
+            'writesubtitles': True,
+            'writeautomaticsub': True,
+            'subtitleslangs': ['pt', 'en'],
+            'ignoreerrors': True,
+            'concurrent_fragment_downloads': max(1, job.fragments),
+        }
+        if job.format_ext == 'mkv':
+            # O mkv aceita qualquer codec, então o merge já sai no formato final
+            ydl_opts['merge_output_format'] = 'mkv'
+        if self.quiet:
+            ydl_opts.update({'quiet': True, 'no_warnings': True, 'noprogress': True})
+        return ydl_opts
+
+    def output_container(self, job):
+        """Formato final do arquivo, ou None para manter o que o yt-dlp baixar
+
+        Com "Apenas Áudio" e um formato de vídeo escolhido, o áudio fica no
+        formato original. Só para transcrição também: o ffmpeg decodifica
+        qualquer formato direto para o PCM do Whisper.
+        """
+        if job.transcript_only:
+            return None
+        if job.format_ext in AUDIO_CONTAINERS or not job.audio_only:
+            return job.format_ext
+        return None
+
+    def add_postprocessors(self, ydl, job, lease=None):
+        """Conversão para o formato escolhido, logando se houve cópia ou recodificação
+
+        Com `lease`, as conexões com o host são reservadas logo antes da transferência.
+        """
+        if lease is not None:
+            ydl.add_post_processor(_InfoCapture(lease.hold), when='before_dl')
+        container = self.output_container(job)
+        if container:
+            ydl.add_post_processor(_ContainerConvert(container, lambda method: self.job_log(job, f"🎞️ {method}")),
+                                   when='post_process')
+
+    def throttle_hook(self, job):
+        """progress_hook que passa os bytes do job pelo agendador de banda
+
+        Roda na thread do download (ou do fragmento), então esperar aqui
+        segura aquele stream até a banda permitir.
+        """
+        seen = {}
+        lock = threading.Lock()
+
+        def hook(d):
+            if d['status'] != 'downloading':
+                return
+            key = d.get('filename') or d.get('tmpfilename')
+            done = d.get('downloaded_bytes') or 0
+            with lock:
+                # A primeira leitura só marca o ponto de partida (ex.: .part retomado)
+                delta = done - seen.get(key, done)
+                seen[key] = done
+            if delta > 0:
+                self.scheduler.consume(job.job_id, delta, job.priority)
+
+        return hook
+
+    @staticmethod
+    def track_progress(job):
+        """progress_hook que guarda o último progresso de cada stream no próprio job
+
+        Cada stream terminado conta tempo e bytes na etapa 'download'.
+        """
+        def hook(d):
+            if d['status'] in ('downloading', 'finished'):
+                job.progress[d.get('filename') or d.get('tmpfilename')] = (
+                    d['status'], d.get('downloaded_bytes') or 0,
+                    d.get('total_bytes') or d.get('total_bytes_estimate') or 0, d.get('speed') or 0.0)
+            if d['status'] == 'finished' and job.metrics is not None:
+                job.metrics.add('download', d.get('elapsed') or 0.0,
+                                d.get('total_bytes') or d.get('downloaded_bytes') or 0)
+        return hook
+
+    @staticmethod
+    def track_postprocessing(job):
+        """postprocessor_hook que mede cada pós-processador (merge do ffmpeg, conversão...)"""
+        started = {}
+
+        def hook(d):
+            name = d.get('postprocessor')
+            stage = POSTPROCESSOR_STAGES.get(name, f"pp:{name}")
+            if job.metrics is None or stage is None:
+                return
+            key = (name, threading.get_ident())
+            if d['status'] == 'started':
+                started[key] = time.perf_counter()
+            elif d['status'] == 'finished' and key in started:
+                job.metrics.add(stage, time.perf_counter() - started.pop(key))
+        return hook
+
+    def job_log(self, job, message):
+        """Mensagem para o log da tela/terminal e para o arquivo do job"""
+        self.log(message)
+        if job is not None:
+            if job.messages is not None:
+                job.messages.append(message)
+            if job.log is not None:
+                job.log.write(message)
+
+    def transcribe_audio(self, audio_path, output_path):
+        """Transcreve o áudio de qualquer mídia usando Whisper (bloqueia até terminar)"""
+        self.log("🎤 Iniciando transcrição com Whisper...")
+        transcript_file = os.path.join(output_path, transcript_filename(audio_path))
+        future = self.transcription_pipeline().submit(audio_path, transcript_file)
+        return self._report_transcription(future_result(future))
+
+    def transcription_pipeline(self):
+        """Pool de processos de transcrição, criado no primeiro uso"""
+        with self._pipeline_lock:
+            if self._pipeline is None:
+                self._pipeline = TranscriptionPipeline(workers=self.transcribe_workers,
+                                                       use_cache=self.transcript_cache)
+            return self._pipeline
+
+    def _report_transcription(self, result, job=None):
+        """Loga o resultado de uma transcrição e devolve o arquivo gerado"""
+        metrics = job.metrics if job is not None and job.metrics is not None else self.metrics
+        if result.get('decode_seconds') is not None:
+            metrics.add('decode', result['decode_seconds'], result.get('audio_bytes') or 0)
+        if result.get('cached'):
+            metrics.add('transcript_cache')
+        elif result.get('transcribe_seconds') is not None:
+            metrics.add('transcribe', result['transcribe_seconds'],
+                        0 if 'decode_seconds' in result else result.get('audio_bytes') or 0)
+        if result.get('load_seconds'):
+            metrics.add('model_load', result['load_seconds'])
+        if result['error']:
+            self.job_log(job, f"❌ Erro na transcrição de {os.path.basename(result['media'])}: {result['error']}")
+            return None
+        if result.get('load_seconds'):
+            self.job_log(job, f"📥 Modelo de transcrição carregado em {result['load_seconds']:.1f}s")
+        if job is not None and job.first_transcript_seconds is None:
+            job.first_transcript_seconds = time.perf_counter() - job.started_at
+            self.job_log(job, f"⏱️ Primeira transcrição pronta {job.first_transcript_seconds:.1f}s após o início do job")
+        parts = f" ({result['chunks']} trechos)" if result.get('chunks', 1) > 1 else ""
+        if result.get('cached'):
+            parts = " (reaproveitada do cache)"
+        self.job_log(job, f"✅ Transcrição salva em: {result['transcript']}{parts}")
+        return result['transcript']
+
+    def preload(self, spec):
+        """Carrega o modelo no pool de transcrição em segundo plano, logando quando terminar"""
+        for future in self.transcription_pipeline().preload(spec):
+            future.add_done_callback(self._report_preload)
+
+    def _report_preload(self, future):
+        """Loga o tempo de carga do modelo feito em segundo plano"""
+        try:
+            load_seconds = future.result()
+        except Exception as e:
+            self.log(f"⚠️  Falha ao pré-carregar o modelo de transcrição: {str(e)}")
+            return
+        if load_seconds:
+            self.log(f"📥 Modelo de transcrição carregado em segundo plano em {load_seconds:.1f}s")
+
+    def _queue_transcription(self, job, filepath, pending, index=None):
+        """post_hook do yt-dlp: manda o arquivo recém-baixado para a transcrição"""
+        name = os.path.basename(filepath)
+        transcript_file = os.path.join(job.folder, transcript_filename(filepath, job.playlist))
+        size = f" ({os.path.getsize(filepath) / 1024 / 1024:.1f} MB)" if os.path.exists(filepath) else ""
+        self.job_log(job, f"🎵 Na fila de transcrição: {name}{size}")
+        # Bloqueia o download se a fila estiver cheia, mantendo a memória sob controle
+        chunk_seconds = job.chunk_minutes * 60 if job.chunk_minutes > 0 else None
+        future = self.transcription_pipeline().submit(filepath, transcript_file, chunk_seconds,
+                                                      job.transcript_formats, job.transcriber())
+        # `pending` recebe um Future que só termina depois do callback (log, diário, limpeza)
+        done = Future()
+        done.media_path = filepath
+
+        def finish(f):
+            result = future_result(f)
+            try:
+                self._transcription_done(result, job, index)
+            finally:
+                done.set_result(result)
+
+        future.add_done_callback(finish)
+        pending.append(done)
+
+    def _transcription_done(self, result, job, index):
+        self._report_transcription(result, job)
+        if not result['transcript']:
+            return
+        if index is not None:
+            self.journal.set_entry(job.job_id, index, 'transcribed')
+        if job.discard_media:
+            # Só a transcrição interessa; em caso de erro o áudio fica para uma nova tentativa
+            try:
+                os.remove(result['media'])
+            except OSError as e:
+                self.job_log(job, f"⚠️  Não foi possível apagar {result['media']}: {e}")
+
+    def _collect_transcriptions(self, job, pending):
+        """Espera as transcrições do job e guarda os resultados nele"""
+        if not pending:
+            self.job_log(job, "⚠️  Nenhum arquivo baixado para transcrição")
+            return
+        self.job_log(job, f"⏳ Aguardando {len(pending)} transcrição(ões)...")
+        wait(pending)
+        for future in pending:
+            result = future_result(future)
+            job.transcriptions.append(result)
+            if result['transcript']:
+                job.transcripts.append(result['transcript'])
+
+    def close(self):
+        """Encerra o pool de transcrição"""
+        with self._pipeline_lock:
+            if self._pipeline is not None:
+                self._pipeline.shutdown()
+                self._pipeline = None
+
+    def write_info_file(self, job):
+        """Salva informações do download"""
+        info_file = os.path.join(job.folder, "info_download.txt")
+        with open(info_file, 'w', encoding='utf-8') as f:
+            f.write("INFORMAÇÕES DO DOWNLOAD\n")
+            f.write("=" * 30 + "\n\n")
+            f.write(f"URL: {job.url}\n")
+            f.write(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
+            f.write(f"Qualidade: {job.quality}\n")
+            f.write(f"Formato: {job.format_ext}\n")
+            f.write(f"Apenas áudio: {'Sim' if job.audio_only else 'Não'}\n")
+            f.write(f"Transcrição: {'Sim' if job.transcribe else 'Não'}\n")
+            if job.transcript_only:
+                f.write(f"Apenas transcrição: Sim (áudio {'mantido' if job.keep_media else 'apagado'})\n")
+            f.write(f"Playlist: {'Sim' if job.playlist else 'Não'}\n")
+            f.write(f"Versão: Simplificada (sem MoviePy)\n")
+            if job.failed_entries:
+                f.write("\nITENS COM FALHA\n")
+                f.write("=" * 30 + "\n\n")
+                for index, url, error in sorted(job.failed_entries):
+                    f.write(f"{index}. {url}: {error}\n")
+            if job.transcriptions:
+                f.write("\nTRANSCRIÇÕES\n")
+                f.write("=" * 30 + "\n\n")
+                for result in job.transcriptions:
+                    status = os.path.basename(result['transcript']) if result['transcript'] else f"ERRO: {result['error']}"
+                    f.write(f"{os.path.basename(result['media'])}: {status}\n")
+        return info_file
+
+    def write_metrics_file(self, job, wall_seconds):
+        """Salva metrics.json com o tempo e os bytes de cada etapa do job"""
+        files = {}
+        for name in sorted(os.listdir(job.folder)):
+            path = os.path.join(job.folder, name)
+            if os.path.isfile(path) and name not in ("metrics.json", "job.log"):
+                files[name] = os.path.getsize(path)
+        report = {
+            'job_id': job.job_id,
+            'url': job.url,
+            'status': job.status,
+            'wall_seconds': round(wall_seconds, 3),
+            'first_transcript_seconds': (round(job.first_transcript_seconds, 3)
+                                         if job.first_transcript_seconds is not None else None),
+            'stages': job.metrics.snapshot(),
+            'files': files,
+        }
+        metrics_file = os.path.join(job.folder, "metrics.json")
+        with open(metrics_file, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return metrics_file
+
+    def extract_info(self, url, metrics=None):
+        """Metadados de uma URL, usando o cache quando possível
+
+        Playlists são extraídas de forma "flat" e preguiçosa: `info['entries']`
+        é um gerador que busca as páginas da playlist conforme é consumido, sem
+        resolver os formatos de cada vídeo. O tempo vai para `metrics` (o do
+        engine por padrão).
+        """
+        metrics = metrics if metrics is not None else self.metrics
+        info = self.info_cache.get(url)
+        if info is not None:
+            metrics.add('info_cache')
+            return info
+
+        ydl = yt_dlp.YoutubeDL({'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist'})
+        try:
+            with metrics.stage('info'):
+                info = ydl.extract_info(url, download=False, process=False)
+                if info.get('_type') in ('playlist', 'multi_video'):
+                    info['entries'] = self._stream_entries(ydl, info['entries'])
+                    ydl = None  # fechado pelo gerador
+                    return info
+                info = ydl.process_ie_result(info, download=False)
+        finally:
+            if ydl is not None:
+                ydl.close()
 
-# Imports básicos
-try:
-    import yt_dlp
-except ImportError:
-    print("Instalando yt-dlp...")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "yt-dlp"])
-    import yt_dlp
+        self.info_cache.put(url, info)
+        return info
 
-try:
-    import whisper
-except ImportError:
-    print("Instalando whisper...")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "openai-whisper"])
-    import whisper
+    @staticmethod
+    def _stream_entries(ydl, entries):
+        """Repassa as entradas da playlist e fecha o YoutubeDL no final"""
+        try:
+            for entry in entries:
+                if entry:
+                    yield entry
+        finally:
+            ydl.close()
+
+    def download_url(self, url, ydl_opts, job, prefix="", lease=None):
+        """Baixa um vídeo reaproveitando downloads anteriores e metadados em cache
+
+        Se o índice já tem o vídeo com a mesma seleção de formato, o arquivo é
+        linkado na pasta do job (ou pulado) sem tocar a rede. Senão, com cache
+        válido o yt-dlp só reprocessa o info dict salvo (sem nova extração).
+        Se isso falhar, normalmente por URL de stream vencida, o cache é
+        invalidado e o download é refeito do zero. `lease` (ConnectionLease)
+        reserva as conexões com o host só durante a transferência. Devolve o
+        código de retorno do yt-dlp.
+        """
+        video_key = info_cache_key(url)
+        selection = f"{ydl_opts['format']}|{job.format_ext}"
+
+        if job.reuse != "off":
+            existing = self.download_index.lookup(video_key, selection)
+            if existing:
+                return self._reuse_download(url, ydl_opts, job, prefix, existing, video_key, selection)
+
+        def record(filepath):
+            name = os.path.basename(filepath)
+            if prefix and name.startswith(prefix):
+                name = name[len(prefix):]
+            self.download_index.record(video_key, selection, filepath, name, url)
+
+        # O registro vem antes dos outros hooks para o arquivo já constar no índice.
+        # Áudio que vai ser apagado depois da transcrição não entra no índice.
+        if not job.discard_media:
+            ydl_opts = dict(ydl_opts, post_hooks=[record] + list(ydl_opts.get('post_hooks', [])))
+
+        cached_path = self.info_cache.get_path(url)
+        if cached_path:
+            job.metrics.add('info_cache')
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                self.add_postprocessors(ydl, job, lease)
+                retcode = ydl.download_with_info_file(cached_path)
+            if not retcode:
+                return 0
+            self.job_log(job, f"♻️  Metadados em cache falharam, extraindo de novo: {url}")
+            self.info_cache.invalidate(url)
+
+        # A extração (página + formatos) vai até o _InfoCapture, antes do download começar
+        started = time.perf_counter()
+
+        def captured(info):
+            job.metrics.add('extract', time.perf_counter() - started)
+            self.info_cache.put(url, info)
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.add_post_processor(_InfoCapture(captured), when='pre_process')
+            self.add_postprocessors(ydl, job, lease)
+            return ydl.download([url])
+
+    def _reuse_download(self, url, ydl_opts, job, prefix, existing, video_key, selection):
+        """Reaproveita um arquivo do índice em vez de baixar o vídeo de novo"""
+        source, name = existing
+        if job.reuse == "skip":
+            self.job_log(job, f"⏭️  Já baixado, pulando: {name} ({source})")
+            return 0
+
+        target = os.path.join(job.folder, prefix + name)
+        if os.path.abspath(target) != source and not os.path.exists(target):
+            method = link_or_copy(source, target)
+            job.metrics.add('reuse', nbytes=os.path.getsize(target))
+            if not job.discard_media:
+                self.download_index.record(video_key, selection, target, name, url)
+            self.job_log(job, f"🔗 Já baixado, {method} de {source}")
+        # Transcrição e demais hooks tratam o arquivo como se tivesse sido baixado agora
+        for hook in ydl_opts.get('post_hooks', []):
+            hook(target)
+        return 0
+
+    def expand_playlist(self, job):
+        """Lista os vídeos da playlist sem resolver os formatos de cada um
+
+        Devolve None quando a URL não é uma playlist.
+        """
+        info = self.extract_info(job.url, job.metrics)
+        if not info or 'entries' not in info:
+            return None
+
+        entries = []
+        with job.metrics.stage('playlist'):
+            for position, entry in enumerate(info['entries'], start=1):
+                url = entry.get('webpage_url') or entry.get('url')
+                if url:
+                    entries.append((entry.get('playlist_index') or position, url))
+        return entries
+
+    def download_entry(self, job, ydl_opts, index, url, prefix, pending):
+        """Baixa um item do job com novas tentativas, registrando tudo no diário
+
+        Falhas passageiras (rede, 403/429/5xx) são tentadas de novo até
+        job.retries vezes, com espera exponencial e jitter; o .part da
+        tentativa anterior é continuado. As outras (404, vídeo privado ou
+        removido) falham na hora. Devolve True se o item terminou bem.
+        """
+        def mark_merged(filepath):
+            self.journal.set_entry(job.job_id, index, 'merged', file=filepath)
+
+        hooks = [mark_merged]
+        if job.transcribe:
+            hooks.append(lambda filepath: self._queue_transcription(job, filepath, pending, index))
+        entry_opts = dict(ydl_opts, post_hooks=hooks)
+        if prefix:
+            entry_opts['outtmpl'] = os.path.join(job.folder, prefix + "%(title)s.%(ext)s")
+            entry_opts['noplaylist'] = True
+        # Cada fragmento simultâneo é uma conexão com o host
+        connections = entry_opts['concurrent_fragment_downloads']
+        if self.scheduler.max_per_host:
+            connections = min(connections, self.scheduler.max_per_host)
+            entry_opts['concurrent_fragment_downloads'] = connections
+
+        error = None
+        retries = max(0, job.retries)
+        for attempt in range(retries + 1):
+            self.journal.set_entry(job.job_id, index, 'downloading')
+            lease = self.scheduler.lease(url, connections, job.priority)
+            errors = YdlErrorLog(self.quiet)
+            attempt_opts = dict(entry_opts, logger=errors,
+                                progress_hooks=[lease.progress_hook] + entry_opts['progress_hooks'])
+            try:
+                error = errors.last_error() if self.download_url(url, attempt_opts, job, prefix, lease) else None
+            except Exception as e:
+                error = str(e)
+            finally:
+                lease.release()
+            if error is None:
+                # Sem post_hook (ex.: reuse='skip') o item termina aqui mesmo
+                self.journal.set_entry(job.job_id, index, 'merged', only_from='downloading')
+                return True
+            if not is_transient_error(error):
+                break
+            if attempt < retries:
+                delay = retry_delay(attempt)
+                self.job_log(job, f"🔁 {index}. {url}: {error}; nova tentativa em {delay:.0f}s")
+                time.sleep(delay)
+
+        self.journal.set_entry(job.job_id, index, 'failed', error=error)
+        job.failed_entries.append((index, url, error))
+        return False
+
+    def download_playlist(self, job, ydl_opts, entries, pending, width=3):
+        """Baixa os vídeos da playlist em paralelo na mesma pasta
+
+        Cada arquivo recebe o número do vídeo na playlist (com `width` dígitos)
+        como prefixo, então a ordem dos nomes é estável mesmo com os downloads
+        terminando fora de ordem. Devolve o número de vídeos que falharam.
+        """
+        self.job_log(job, f"📋 {len(entries)} vídeos na playlist, {job.playlist_workers} downloads simultâneos")
+
+        def download(item):
+            index, url = item
+            if self.download_entry(job, ydl_opts, index, url, f"{index:0{width}d} - ", pending):
+                self.job_log(job, f"  ✅ {index}. {url}")
+                return True
+            self.job_log(job, f"  ❌ {index}. {url}")
+            return False
+
+        with ThreadPoolExecutor(max_workers=max(1, job.playlist_workers)) as pool:
+            results = list(pool.map(download, entries))
+        return results.count(False)
+
+    def pending_entries(self, job, entries, pending):
+        """Filtra itens já concluídos numa execução anterior do mesmo job
+
+        Itens baixados mas ainda não transcritos voltam direto para a fila
+        de transcrição.
+        """
+        states = self.journal.entries(job.job_id)
+        todo = []
+        for index, url in entries:
+            _, state, file = states.get(index, (url, 'queued', None))
+            if state in JobJournal.DONE_STATES:
+                if state == 'transcribed' or not job.transcribe:
+                    continue
+                # Baixado mas não transcrito: só a transcrição falta
+                if file and os.path.exists(file):
+                    self._queue_transcription(job, file, pending, index)
+                    continue
+            todo.append((index, url))
+        skipped = len(entries) - len(todo)
+        if skipped:
+            self.job_log(job, f"⏩ {skipped} itens já concluídos numa execução anterior")
+        return todo
+
+    def run_job(self, job):
+        """Executa o download de um job e devolve o próprio job atualizado
+
+        Um job com `folder` já preenchido (vindo do diário) é retomado na
+        mesma pasta, pulando os itens que já terminaram.
+        """
+        try:
+            job.status = "baixando"
+            job.started_at = time.perf_counter()
+            job.metrics = StageMetrics(parent=self.metrics)
+            if job.transcribe:
+                # Whisper/torch carregam nos processos enquanto o download roda
+                self.preload(job.transcriber())
+            resuming = bool(job.folder and os.path.isdir(job.folder))
+            if not resuming:
+                job.folder = self.create_job_folder(job)
+            job.log = JobLog(os.path.join(job.folder, "job.log"))
+            job.log.write(f"Job {'retomado' if resuming else 'iniciado'}: {job.url}")
+            ydl_opts = self.build_ydl_opts(job, job.folder)
+
+            # Cada arquivo pronto vai direto para a transcrição enquanto o próximo baixa
+            pending = []
+
+            # Os itens vêm do diário ao retomar, senão da playlist
+            entries = sorted((index, url) for index, (url, _, _) in self.journal.entries(job.job_id).items())
+            if not entries and job.playlist:
+                self.job_log(job, f"📋 Baixando playlist: {job.url}")
+                entries = self.expand_playlist(job)
+                # Marcado como playlist, mas a URL é de um vídeo só
+                job.playlist = bool(entries)
+            if not entries:
+                entries = [(1, job.url)]
+            self.journal.start_job(job)
+            self.journal.add_entries(job.job_id, entries)
+            todo = self.pending_entries(job, entries, pending)
+
+            if job.playlist:
+                # Largura pela playlist inteira, para os nomes não mudarem ao retomar
+                width = max(3, len(str(max(index for index, _ in entries))))
+                failures = self.download_playlist(job, ydl_opts, todo, pending, width) if todo else 0
+            else:
+                self.job_log(job, f"🎬 Baixando vídeo: {job.url}")
+                failures = 0 if not todo or self.download_entry(job, ydl_opts, 1, job.url, "", pending) else 1
+                if failures:
+                    raise RuntimeError(f"o yt-dlp não conseguiu baixar o vídeo: {job.failed_entries[-1][2]}")
+
+            self.job_log(job, f"✅ Download concluído: {job.url}")
+
+            # Transcrição automática
+            if job.transcribe:
+                self._collect_transcriptions(job, pending)
+
+            self.write_info_file(job)
+            self.job_log(job, f"📁 Arquivos salvos em: {job.folder}")
+            if failures:
+                job.status = "parcial"
+                job.error = f"{failures} itens da playlist falharam"
+                self.job_log(job, f"❌ {failures} itens falharam:")
+                for index, url, error in sorted(job.failed_entries):
+                    self.job_log(job, f"  ❌ {index}. {url}: {error}")
+            else:
+                job.status = "concluido"
+
+        except Exception as e:
+            job.status = "erro"
+            job.error = str(e)
+            self.job_log(job, f"❌ ERRO no download de {job.url}: {str(e)}")
+
+        finally:
+            self.journal.finish_job(job.job_id, job.status)
+            wall_seconds = time.perf_counter() - job.started_at
+            job.metrics.add('job', wall_seconds)
+            if job.folder and os.path.isdir(job.folder):
+                try:
+                    self.write_metrics_file(job, wall_seconds)
+                except OSError as e:
+                    self.job_log(job, f"⚠️ Não foi possível salvar metrics.json: {e}")
+            if job.log is not None:
+                job.log.close()
+
+        return job
+
+    def resume_unfinished(self):
+        """Jobs interrompidos numa execução anterior, prontos para run_batch"""
+        return self.journal.unfinished_jobs()
+
+    def run_batch(self, jobs):
+        """Baixa vários jobs em paralelo usando no máximo `workers` threads
+
+        Jobs com prioridade maior saem primeiro da fila; entre iguais vale
+        a ordem da lista.
+        """
+        pending = queue.PriorityQueue()
+        for order, job in enumerate(jobs):
+            pending.put((-job.priority, order, job))
+
+        def worker():
+            while True:
+                try:
+                    _, _, job = pending.get_nowait()
+                except queue.Empty:
+                    return
+                self.run_job(job)
+
+        threads = [threading.Thread(target=worker, daemon=True)
+                   for _ in range(min(self.workers, len(jobs)))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return jobs
+
+
+# Status de um job que não muda mais
+FINAL_STATUSES = ("concluido", "parcial", "erro", "cancelado")
+
+
+class DownloadService:
+    """Modo serviço: um DownloadEngine compartilhado atendendo jobs pela API HTTP
+
+    Todos os clientes usam o mesmo pool de downloads, o mesmo pool de
+    transcrição e o mesmo modelo já carregado, em vez de cada janela pagar
+    o import do Whisper e manter seu próprio modelo na memória.
+    """
+
+    def __init__(self, engine, download_path, spec=TranscriberSpec(), max_finished=200):
+        self.engine = engine
+        self.download_path = download_path
+        self.spec = spec
+        self.max_finished = max_finished
+        self.started_at = time.time()
+        self.jobs = {}                       # job_id -> DownloadJob, em ordem de chegada
+        self._lock = threading.Lock()
+        self._order = itertools.count()
+        self._queue = queue.PriorityQueue()
+        self._listings = {}                  # url -> playlist sendo listada pelo /info
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(engine.workers)]
+
+    def start(self):
+        """Carrega o modelo, retoma jobs interrompidos e inicia os workers"""
+        self.engine.log(f"🔥 Carregando o modelo {self.spec.model_name} ({self.spec.backend}) no pool de transcrição")
+        self.engine.preload(self.spec)
+        for job in self.engine.resume_unfinished():
+            self.engine.log(f"⏯️  Retomando: {job.url}")
+            self._enqueue(job)
+        for thread in self._threads:
+            thread.start()
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            self.engine.run_job(job)
+
+    def _enqueue(self, job):
+        entry = (-job.priority, next(self._order), job)
+        if job.messages is None:
+            job.messages = MessageTail()
+        with self._lock:
+            self.jobs[job.job_id] = job
+            finished = [job_id for job_id, other in self.jobs.items() if other.status in FINAL_STATUSES]
+            for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+                del self.jobs[job_id]
+        self._queue.put(entry)
+
+    # Valores aceitos pela API: escolhas como na linha de comando e faixas (mín, máx)
+    # para os números, que são trazidos para dentro da faixa em vez de recusados
+    OPTION_CHOICES = {'quality': QUALITIES, 'format_ext': OUTPUT_FORMATS, 'reuse': REUSE_MODES}
+    OPTION_LIMITS = {'playlist_workers': (1, 16), 'fragments': (1, 16), 'chunk_minutes': (0, 180),
+                     'transcribe_threads': (0, 64), 'transcribe_batch': (1, 64), 'retries': (0, 10),
+                     'priority': (-100, 100)}
+
+    @staticmethod
+    def _check_types(options):
+        """Confere os tipos das opções vindas do JSON contra os campos do DownloadJob
+
+        Números podem vir como texto ("10"); booleanos têm de ser true/false.
+        """
+        checked = dict(options)
+        for spec in fields(DownloadJob):
+            if spec.name not in DownloadJob.OPTION_FIELDS or spec.name not in options:
+                continue
+            value = options[spec.name]
+            if spec.type is bool:
+                valid = isinstance(value, bool)
+            elif spec.type is int:
+                valid = not isinstance(value, bool) and isinstance(value, (int, str))
+                if valid:
+                    try:
+                        value = int(value)
+                    except ValueError:
+                        valid = False
+            elif spec.type is tuple:
+                valid = isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value)
+            else:
+                valid = isinstance(value, spec.type)
+            if not valid:
+                raise ValueError(f"valor inválido para '{spec.name}': {value!r} "
+                                 f"(esperado {'list' if spec.type is tuple else spec.type.__name__})")
+            checked[spec.name] = value
+        return checked
+
+    def _download_folder(self, path):
+        """Pasta pedida pelo cliente, que precisa ficar dentro da pasta do serviço (--output)
+
+        Caminhos relativos são relativos a ela; links simbólicos são resolvidos
+        antes da comparação.
+        """
+        root = os.path.realpath(self.download_path)
+        folder = os.path.realpath(os.path.join(root, path or ""))
+        if os.path.commonpath([root, folder]) != root:
+            raise ValueError(f"a pasta de download precisa ficar dentro de {root}")
+        if not os.path.isdir(folder):
+            raise ValueError(f"pasta de download não existe: {path}")
+        return folder
+
+    def submit(self, options):
+        """Cria um job a partir das opções de DownloadJob.options() e o coloca na fila
+
+        Levanta ValueError com a mensagem para o cliente se algo for inválido.
+        """
+        if not isinstance(options, dict) or not options.get('url'):
+            raise ValueError("informe ao menos 'url'")
+        options = self._check_types(options)
+        for name, choices in self.OPTION_CHOICES.items():
+            if name in options and options[name] not in choices:
+                raise ValueError(f"valor inválido para '{name}': {options[name]!r} "
+                                 f"(aceitos: {', '.join(choices)})")
+        for name, (low, high) in self.OPTION_LIMITS.items():
+            if name in options:
+                options[name] = min(high, max(low, options[name]))
+        options['download_path'] = self._download_folder(options.get('download_path'))
+        options.setdefault('backend', self.spec.backend)
+        options.setdefault('model_name', self.spec.model_name)
+        if options['backend'] not in TRANSCRIBER_BACKENDS:
+            raise ValueError(f"motor de transcrição desconhecido: {options['backend']}")
+        if options['model_name'] not in WHISPER_MODELS:
+            raise ValueError(f"modelo desconhecido: {options['model_name']}")
+        unknown = [fmt for fmt in options.get('transcript_formats', ()) if fmt not in TRANSCRIPT_WRITERS]
+        if unknown:
+            raise ValueError(f"formato de transcrição desconhecido: {', '.join(unknown)}")
+        try:
+            job = DownloadJob.from_options(options)
+        except TypeError as e:
+            raise ValueError(str(e))
+        self.engine.log(f"📨 Novo job {job.job_id[:8]}: {job.url}")
+        self._enqueue(job)
+        return job
+
+    INFO_PAGE = 100       # entradas de playlist por resposta de /info
+    INFO_LISTINGS = 8     # listagens em andamento guardadas para as próximas páginas
+
+    def info(self, url, offset=0):
+        """O que o botão Info mostra, extraído aqui para a janela não precisar do yt-dlp
+
+        Playlists vêm em páginas de INFO_PAGE entradas (só título e duração), a
+        partir de `offset`, com `done` indicando a última. A listagem continua de
+        onde a página anterior parou, sem listar o canal inteiro antes de responder.
+        """
+        with self._lock:
+            listing = self._listings.get(url) if offset else None
+        if listing is None:
+            if offset:
+                raise ValueError("listagem expirada; peça de novo a partir de offset=0")
+            info = self.engine.extract_info(url)
+            if 'entries' not in info:
+                return self._info_summary(info)
+            listing = {'head': {'title': info.get('title'), 'description': info.get('description'),
+                                'playlist_count': info.get('playlist_count')},
+                       'entries': iter(info['entries']), 'seen': [], 'done': False,
+                       'lock': threading.Lock()}
+        with listing['lock']:
+            while not listing['done'] and len(listing['seen']) < offset + self.INFO_PAGE:
+                entry = next(listing['entries'], None)
+                if entry is None:
+                    listing['done'] = True
+                else:
+                    listing['seen'].append({'title': entry.get('title'), 'duration': entry.get('duration')})
+            page = listing['seen'][offset:offset + self.INFO_PAGE]
+            done = listing['done'] and offset + len(page) >= len(listing['seen'])
+        with self._lock:
+            if self._listings.get(url) is listing:
+                del self._listings[url]
+            if not done:
+                self._listings[url] = listing
+                while len(self._listings) > self.INFO_LISTINGS:
+                    del self._listings[next(iter(self._listings))]
+        return dict(listing['head'], entries=page, offset=offset, done=done)
+
+    @staticmethod
+    def _info_summary(info):
+        """Resumo de um vídeo só; campos ausentes ficam de fora, como no info dict do yt-dlp"""
+        summary = {key: info[key] for key in ('title', 'uploader', 'duration', 'view_count',
+                                              'upload_date', 'description') if info.get(key) is not None}
+        summary['formats'] = [{key: fmt[key] for key in ('vcodec', 'acodec', 'height', 'ext')
+                               if fmt.get(key) is not None}
+                              for fmt in info.get('formats') or ()]
+        return summary
+
+    def job_state(self, job, since=0):
+        """Estado do job em JSON; `messages` traz só as mensagens a partir de `since`"""
+        messages, next_index = job.messages.since(since) if job.messages is not None else ([], since)
+        return {
+            'job_id': job.job_id,
+            'status': job.status,
+            'options': job.options(),
+            'folder': job.folder,
+            'error': job.error,
+            'progress': job.progress.copy(),
+            'transcripts': list(job.transcripts),
+            'failed_entries': [list(entry) for entry in job.failed_entries],
+            'stages': job.metrics.snapshot() if job.metrics is not None else {},
+            'messages': messages,
+            'next': next_index,
+        }
+
+    def status(self):
+        with self._lock:
+            jobs = list(self.jobs.values())
+        rates, total = self.engine.scheduler.rates()
+        return {
+            'uptime': time.time() - self.started_at,
+            'workers': self.engine.workers,
+            'transcribe_workers': self.engine.transcribe_workers,
+            'model': {'backend': self.spec.backend, 'model_name': self.spec.model_name},
+            'queued': sum(job.status == "pendente" for job in jobs),
+            'running': sum(job.status not in FINAL_STATUSES and job.status != "pendente" for job in jobs),
+            'rate': total,
+            'rates': rates,
+            'limit': self.engine.scheduler.rate,
+            'max_per_host': self.engine.scheduler.max_per_host,
+            'jobs': [{'job_id': job.job_id, 'url': job.url, 'status': job.status} for job in jobs],
+        }
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    """Rotas da API: GET /status, GET /metrics, GET /info?url=, POST /jobs, GET /jobs e GET /jobs/<id>?since=N"""
+
+    service = None  # DownloadService, definido em serve()
+
+    def _send(self, code, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if parts == ["status"]:
+            return self._send(200, self.service.status())
+        if parts == ["metrics"]:
+            return self._send(200, self.service.engine.metrics.snapshot())
+        if parts == ["info"]:
+            query = parse_qs(url.query)
+            target = query.get('url', [''])[0]
+            if not target:
+                return self._send(400, {'error': "informe 'url'"})
+            try:
+                offset = max(0, int(query.get('offset', ['0'])[0]))
+            except ValueError:
+                return self._send(400, {'error': "'offset' precisa ser um número"})
+            try:
+                return self._send(200, self.service.info(target, offset))
+            except ValueError as e:
+                return self._send(400, {'error': str(e)})
+            except Exception as e:
+                return self._send(502, {'error': str(e)})
+        if parts == ["jobs"]:
+            return self._send(200, self.service.status()['jobs'])
+        if len(parts) == 2 and parts[0] == "jobs":
+            job = self.service.jobs.get(parts[1])
+            if job is None:
+                return self._send(404, {'error': "job não encontrado"})
+            since = parse_qs(url.query).get('since', ['0'])[0]
+            return self._send(200, self.service.job_state(job, int(since) if since.isdigit() else 0))
+        self._send(404, {'error': "rota desconhecida"})
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            return self._send(404, {'error': "rota desconhecida"})
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            job = self.service.submit(json.loads(self.rfile.read(length) or b"{}"))
+        except ValueError as e:
+            return self._send(400, {'error': str(e)})
+        self._send(201, {'job_id': job.job_id})
+
+    def log_message(self, format, *args):
+        # Sem o log de acesso padrão no stderr (o cliente consulta o job a cada meio segundo)
+        pass
+
+
+def serve(service, host="127.0.0.1", port=8777):
+    """Sobe a API HTTP do serviço e atende até ser interrompido"""
+    handler = type("ServiceHandler", (_ServiceHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    service.start()
+    service.engine.log(f"🛰️  Serviço ouvindo em http://{host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+class ServiceClient:
+    """Cliente da API do DownloadService (usado pela janela no modo --connect)"""
+
+    def __init__(self, base_url, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, method, path, data=None, timeout=None):
+        body = json.dumps(data).encode('utf-8') if data is not None else None
+        request = urllib.request.Request(self.base_url + path, data=body, method=method,
+                                         headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.load(e).get('error')
+            except ValueError:
+                message = None
+            raise RuntimeError(message or f"HTTP {e.code}")
+
+    def submit(self, options):
+        """Envia um job (opções de DownloadJob.options()) e devolve o job_id"""
+        return self._request("POST", "/jobs", options)['job_id']
+
+    def job(self, job_id, since=0):
+        return self._request("GET", f"/jobs/{job_id}?since={since}")
+
+    def status(self):
+        return self._request("GET", "/status")
+
+    def info(self, url):
+        """Metadados resumidos de uma URL, extraídos pelo serviço
+
+        Como engine.extract_info: em playlists, `entries` é um gerador que
+        busca as páginas seguintes no serviço conforme é consumido.
+        """
+        info = self._info_page(url, 0)
+        if 'entries' not in info:
+            return info
+
+        def entries(page):
+            while True:
+                yield from page['entries']
+                if page['done']:
+                    return
+                page = self._info_page(url, page['offset'] + len(page['entries']))
+
+        return dict(info, entries=entries(info))
+
+    def _info_page(self, url, offset):
+        return self._request("GET", f"/info?{urlencode({'url': url, 'offset': offset})}", timeout=120)
+
+
+class UIEventBus:
+    """Fila de eventos das threads de trabalho para a thread do Tk
+
+    As threads só chamam post()/progress(), que não tocam em widgets. A GUI
+    chama drain() periodicamente (via after()) e aplica tudo de uma vez.
+    Progresso é coalescido: para cada stream só o último valor é guardado,
+    então centenas de ticks por segundo viram uma atualização por quadro.
+    """
+
+    # O yt-dlp não avisa quando um stream morre: sem tick por este tempo, ele sai do resumo
+    STALE_SECONDS = 10.0
 
-class YouTubeDownloaderSimple:
     def __init__(self):
+        self._events = deque()
+        self._progress = {}
+        self._lock = threading.Lock()
+        # Medição do custo de cada tick de progresso nas threads de download
+        self.ticks = 0
+        self.tick_seconds = 0.0
+
+    def post(self, kind, *args):
+        """Enfileira um evento ('log', 'status', 'message', ...)"""
+        self._events.append((kind, args))
+
+    def progress(self, key, status, downloaded=0, total=0, speed=0.0):
+        """Atualiza o progresso de um stream (só o último valor importa)"""
+        started = time.perf_counter()
+        with self._lock:
+            self._progress[key] = (status, downloaded, total, speed, time.monotonic())
+            self.ticks += 1
+            self.tick_seconds += time.perf_counter() - started
+
+    def drain(self):
+        """Eventos pendentes e um resumo do progresso de todos os streams
+
+        O resumo soma bytes e velocidade dos streams ativos; streams que já
+        terminaram são contados uma vez e descartados, e os parados há mais de
+        STALE_SECONDS (download que falhou no meio) somem sem contar.
+        """
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+
+        cutoff = time.monotonic() - self.STALE_SECONDS
+        with self._lock:
+            progress = {key: value for key, value in self._progress.items()
+                        if value[0] != 'downloading' or value[4] >= cutoff}
+            self._progress = {key: value for key, value in progress.items() if value[0] == 'downloading'}
+
+        if not progress:
+            return events, None
+        active = [value for value in progress.values() if value[0] == 'downloading']
+        summary = {
+            'active': len(active),
+            'finished': len(progress) - len(active),
+            'downloaded': sum(value[1] for value in active),
+            'total': sum(value[2] for value in active),
+            'speed': sum(value[3] for value in active),
+        }
+        return events, summary
+
+    def clear_progress(self):
+        with self._lock:
+            self._progress.clear()
+
+    def tick_stats(self):
+        """(ticks de progresso, microssegundos médios gastos por tick)"""
+        with self._lock:
+            average = self.tick_seconds / self.ticks * 1e6 if self.ticks else 0.0
+            return self.ticks, average
+
+
+class YouTubeDownloaderSimple:
+    def __init__(self, max_log_lines=2000, service_url=None):
         self.root = tk.Tk()
         self.root.title("YouTube Downloader Pro - Versão Simplificada")
         self.root.geometry("800x700")
@@ -43,12 +2715,53 @@ class YouTubeDownloaderSimple:
         self.transcribe_var = tk.BooleanVar(value=True)
         self.audio_only_var = tk.BooleanVar(value=False)
         self.playlist_var = tk.BooleanVar(value=False)
+        self.playlist_workers_var = tk.IntVar(value=4)
+        self.fragments_var = tk.IntVar(value=4)
+        self.long_audio_var = tk.BooleanVar(value=False)
+        self.subtitle_files_var = tk.BooleanVar(value=False)
+        self.model_var = tk.StringVar(value="base")
+        self.backend_var = tk.StringVar(value="whisper")
+        self.transcribe_threads_var = tk.IntVar(value=0)
+        self.transcript_only_var = tk.BooleanVar(value=False)
+        self.keep_media_var = tk.BooleanVar(value=False)
+        self.rate_limit_var = tk.DoubleVar(value=0)     # MB/s somando todos os downloads, 0 = sem limite
+        self.max_per_host_var = tk.IntVar(value=0)
+        self.urgent_var = tk.BooleanVar(value=False)
+        self.rates_var = tk.StringVar(value="")
+        # Jobs em andamento, para nomear as velocidades por job
+        self.active_jobs = {}
+        # Velocidade dos jobs que rodam no serviço (modo --connect), por job_id local,
+        # e o limite de banda do serviço, lido de /status
+        self.remote_rates = {}
+        self.remote_limit = 0
         
-        # Modelo Whisper
-        self.whisper_model = None
+        # Eventos das threads de trabalho, aplicados pela thread do Tk
+        self.events = UIEventBus()
+        
+        # O log da tela guarda só as últimas linhas; o histórico completo fica no job.log
+        self.max_log_lines = max(100, int(max_log_lines))
+        self.log_line_count = 0
+        
+        # Com um serviço (--connect), os jobs rodam lá e a janela só acompanha: sem
+        # motor local, que criaria caches, índice e diário próprios
+        self.client = ServiceClient(service_url) if service_url else None
+        # Motor de download (o mesmo usado pela linha de comando)
+        self.engine = None if self.client else DownloadEngine(workers=1, log=self.log_message,
+                                                              progress_hook=self.progress_hook)
+        if self.client:
+            threading.Thread(target=self.refresh_remote_limit, daemon=True).start()
         
         self.setup_ui()
         self.center_window()
+        self.root.after_idle(self.report_startup_time)
+        self.root.after(500, self.offer_resume)
+        self.root.after(self.FRAME_MS, self.pump_events)
+        self.root.after(self.RATES_MS, self.show_rates)
+        
+    # Intervalo entre atualizações da tela (~20 quadros por segundo)
+    FRAME_MS = 50
+    # Intervalo entre atualizações das velocidades por job
+    RATES_MS = 1000
         
     def setup_ui(self):
         # Estilo
@@ -87,13 +2800,23 @@ class YouTubeDownloaderSimple:
         
         ttk.Label(row1_frame, text="Qualidade:").pack(side=tk.LEFT)
         quality_combo = ttk.Combobox(row1_frame, textvariable=self.quality_var, width=15, state='readonly')
-        quality_combo['values'] = ('best', 'worst', '2160p', '1440p', '1080p', '720p', '480p', '360p', '240p')
+        quality_combo['values'] = QUALITIES
         quality_combo.pack(side=tk.LEFT, padx=(5, 20))
         
         ttk.Label(row1_frame, text="Formato:").pack(side=tk.LEFT)
         format_combo = ttk.Combobox(row1_frame, textvariable=self.format_var, width=10, state='readonly')
-        format_combo['values'] = ('mp4', 'webm', 'mkv', 'avi', 'mp3', 'wav', 'flac', 'm4a')
-        format_combo.pack(side=tk.LEFT, padx=(5, 0))
+        format_combo['values'] = OUTPUT_FORMATS
+        format_combo.pack(side=tk.LEFT, padx=(5, 20))
+        
+        ttk.Label(row1_frame, text="Modelo Whisper:").pack(side=tk.LEFT)
+        model_combo = ttk.Combobox(row1_frame, textvariable=self.model_var, width=10, state='readonly')
+        model_combo['values'] = WHISPER_MODELS
+        model_combo.pack(side=tk.LEFT, padx=(5, 20))
+        
+        ttk.Label(row1_frame, text="Motor:").pack(side=tk.LEFT)
+        backend_combo = ttk.Combobox(row1_frame, textvariable=self.backend_var, width=14, state='readonly')
+        backend_combo['values'] = tuple(TRANSCRIBER_BACKENDS)
+        backend_combo.pack(side=tk.LEFT, padx=(5, 0))
         
         # Linha 2 - Checkboxes
         row2_frame = ttk.Frame(options_frame)
@@ -101,7 +2824,34 @@ class YouTubeDownloaderSimple:
         
         ttk.Checkbutton(row2_frame, text="🎵 Apenas Áudio", variable=self.audio_only_var).pack(side=tk.LEFT, padx=(0, 20))
         ttk.Checkbutton(row2_frame, text="📝 Transcrever Automaticamente", variable=self.transcribe_var).pack(side=tk.LEFT, padx=(0, 20))
-        ttk.Checkbutton(row2_frame, text="📋 É Playlist", variable=self.playlist_var).pack(side=tk.LEFT)
+        ttk.Checkbutton(row2_frame, text="📋 É Playlist", variable=self.playlist_var).pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Checkbutton(row2_frame, text="🗒️ Só a transcrição", variable=self.transcript_only_var).pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Checkbutton(row2_frame, text="💾 Manter áudio", variable=self.keep_media_var).pack(side=tk.LEFT)
+        
+        # Linha 3 - Paralelismo
+        row3_frame = ttk.Frame(options_frame)
+        row3_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        ttk.Label(row3_frame, text="Vídeos simultâneos (playlist):").pack(side=tk.LEFT)
+        ttk.Spinbox(row3_frame, from_=1, to=16, textvariable=self.playlist_workers_var, width=5).pack(side=tk.LEFT, padx=(5, 20))
+        ttk.Label(row3_frame, text="Fragmentos simultâneos:").pack(side=tk.LEFT)
+        ttk.Spinbox(row3_frame, from_=1, to=32, textvariable=self.fragments_var, width=5).pack(side=tk.LEFT, padx=(5, 20))
+        ttk.Label(row3_frame, text="Threads (0 = auto):").pack(side=tk.LEFT)
+        ttk.Spinbox(row3_frame, from_=0, to=64, textvariable=self.transcribe_threads_var, width=5).pack(side=tk.LEFT, padx=(5, 20))
+        ttk.Checkbutton(row3_frame, text="⏱️ Áudio longo em trechos", variable=self.long_audio_var).pack(side=tk.LEFT, padx=(0, 20))
+        ttk.Checkbutton(row3_frame, text="📄 SRT/VTT/JSON", variable=self.subtitle_files_var).pack(side=tk.LEFT)
+        
+        # Linha 4 - Banda e prioridade (valem para todos os downloads em andamento)
+        row4_frame = ttk.Frame(options_frame)
+        row4_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        ttk.Label(row4_frame, text="Banda máx. (MB/s, 0 = livre):").pack(side=tk.LEFT)
+        ttk.Spinbox(row4_frame, from_=0, to=1000, increment=0.5, textvariable=self.rate_limit_var,
+                    width=6, command=self.apply_limits).pack(side=tk.LEFT, padx=(5, 20))
+        ttk.Label(row4_frame, text="Conexões por servidor (0 = livre):").pack(side=tk.LEFT)
+        ttk.Spinbox(row4_frame, from_=0, to=64, textvariable=self.max_per_host_var,
+                    width=5, command=self.apply_limits).pack(side=tk.LEFT, padx=(5, 20))
+        ttk.Checkbutton(row4_frame, text="🚨 Urgente", variable=self.urgent_var).pack(side=tk.LEFT)
         
         # Caminho de download
         path_frame = ttk.LabelFrame(main_frame, text="📁 Pasta de Download", padding=10)
@@ -126,7 +2876,9 @@ class YouTubeDownloaderSimple:
         # Barra de progresso
         self.progress_var = tk.DoubleVar()
         self.progress_bar = ttk.Progressbar(main_frame, variable=self.progress_var, maximum=100)
-        self.progress_bar.pack(fill=tk.X, pady=(0, 10))
+        self.progress_bar.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(main_frame, textvariable=self.rates_var, font=('Arial', 9),
+                  foreground='#888888', background='#2b2b2b').pack(fill=tk.X, pady=(0, 5))
         
         # Log de saída
         log_frame = ttk.LabelFrame(main_frame, text="📋 Log de Atividades", padding=10)
@@ -144,7 +2896,30 @@ class YouTubeDownloaderSimple:
         # Mensagem inicial
         self.log_message("✅ YouTube Downloader Pro carregado com sucesso!")
         self.log_message("💡 Esta versão não precisa do MoviePy")
-        self.log_message("🎤 Transcrição funciona apenas com arquivos de áudio")
+        self.log_message("🎤 Transcrição funciona com arquivos de áudio e de vídeo")
+        
+    def report_startup_time(self):
+        """Loga quanto tempo levou do início do processo até a janela aparecer"""
+        elapsed = time.perf_counter() - _PROCESS_START
+        self.log_message(f"⏱️ Janela pronta em {elapsed:.2f}s")
+        
+    def offer_resume(self):
+        """Pergunta se os downloads interrompidos na última execução devem ser retomados"""
+        if self.client:
+            # O serviço retoma os próprios jobs ao iniciar
+            return
+        jobs = self.engine.resume_unfinished()
+        if not jobs:
+            return
+        urls = "\n".join(job.url for job in jobs[:5])
+        if messagebox.askyesno("Downloads interrompidos",
+                               f"{len(jobs)} download(s) não terminaram na última execução:\n{urls}\n\nRetomar agora?"):
+            for job in jobs:
+                self.log_message(f"⏯️  Retomando: {job.url}")
+                threading.Thread(target=self.download_video, args=(job.url, job), daemon=True).start()
+        else:
+            for job in jobs:
+                self.engine.journal.finish_job(job.job_id, "cancelado")
         
     def center_window(self):
         self.root.update_idletasks()
@@ -155,12 +2930,113 @@ class YouTubeDownloaderSimple:
         self.root.geometry(f'{width}x{height}+{x}+{y}')
         
     def log_message(self, message):
-        """Adiciona mensagem ao log com timestamp"""
+        """Adiciona mensagem ao log com timestamp (pode ser chamada de qualquer thread)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        formatted_message = f"[{timestamp}] {message}\n"
-        self.log_text.insert(tk.END, formatted_message)
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        self.events.post('log', f"[{timestamp}] {message}\n")
+        
+    def set_status(self, text):
+        """Atualiza a barra de status (pode ser chamada de qualquer thread)"""
+        self.events.post('status', text)
+        
+    def show_message(self, kind, title, text):
+        """Mostra um messagebox na thread do Tk"""
+        self.events.post('message', kind, title, text)
+        
+    def pump_events(self):
+        """Aplica na tela os eventos acumulados desde o último quadro"""
+        events, summary = self.events.drain()
+        if summary:
+            self.show_progress(summary)
+        # Buffer circular: numa rajada maior que o limite, só as últimas linhas chegam à tela
+        lines = deque(maxlen=self.max_log_lines)
+        for kind, args in events:
+            if kind == 'log':
+                lines.append(args[0])
+            elif kind == 'status':
+                self.status_var.set(args[0])
+            elif kind == 'message':
+                getattr(messagebox, f"show{args[0]}")(args[1], args[2])
+        if lines:
+            # Um único insert por quadro em vez de um por mensagem
+            text = "".join(lines)
+            self.log_text.insert(tk.END, text)
+            # Linhas do widget, não mensagens: erros do ffmpeg/yt-dlp ocupam várias
+            self.log_line_count += text.count("\n")
+            self.trim_log()
+            self.log_text.see(tk.END)
+        self.root.after(self.FRAME_MS, self.pump_events)
+        
+    def trim_log(self):
+        """Apaga as linhas mais antigas em lote quando o log passa do limite
+
+        Deixa o widget crescer 10% além do limite antes de cortar, para não
+        pagar um delete a cada quadro.
+        """
+        if self.log_line_count <= self.max_log_lines * 1.1:
+            return
+        excess = self.log_line_count - self.max_log_lines
+        self.log_text.delete("1.0", f"{excess + 1}.0")
+        self.log_line_count -= excess
+        
+    def show_progress(self, summary):
+        """Barra e status com o total de todos os downloads em andamento"""
+        if not summary['active']:
+            self.progress_var.set(100)
+            self.status_var.set("Download concluído!")
+            return
+        total = summary['total']
+        downloaded = summary['downloaded']
+        percent = downloaded / total * 100 if total else 0
+        self.progress_var.set(percent)
+        
+        # Velocidade e ETA somando todos os streams
+        speed = summary['speed']
+        speed_str = f"{speed/1024/1024:.1f} MB/s" if speed else "N/A"
+        eta_str = f"{int((total - downloaded) / speed)}s" if speed and total else "N/A"
+        streams = f" | {summary['active']} downloads" if summary['active'] > 1 else ""
+        self.status_var.set(f"Baixando: {percent:.1f}% | {speed_str} | ETA: {eta_str}{streams}")
+        
+    def show_rates(self):
+        """Velocidade atual de cada job e a soma, vindas do agendador de banda"""
+        if self.client:
+            rates = dict(self.remote_rates)
+            total = sum(rates.values())
+        else:
+            rates, total = self.engine.scheduler.rates()
+        if rates:
+            parts = []
+            for job_id, rate in sorted(rates.items(), key=lambda item: -item[1]):
+                job = self.active_jobs.get(job_id)
+                name = job.url.split("//")[-1][:30] if job else job_id[:8]
+                urgent = "🚨" if job and job.priority > 0 else ""
+                parts.append(f"{urgent}{name}: {format_rate(rate)}")
+            limit = self.remote_limit if self.client else self.engine.scheduler.rate
+            limit_str = f" (limite {format_rate(limit)})" if limit else ""
+            self.rates_var.set(f"🚦 Total {format_rate(total)}{limit_str} | " + " | ".join(parts))
+        else:
+            self.rates_var.set("")
+        self.root.after(self.RATES_MS, self.show_rates)
+        
+    def apply_limits(self):
+        """Aplica os limites de banda e conexões da tela, inclusive nos downloads em andamento
+
+        No modo cliente os limites são os do serviço (--limit-rate/--max-per-host).
+        """
+        if self.client:
+            return
+        try:
+            rate = float(self.rate_limit_var.get()) * 1024 * 1024
+            max_per_host = int(self.max_per_host_var.get())
+        except (tk.TclError, ValueError):
+            return
+        self.engine.scheduler.configure(rate=rate, max_per_host=max_per_host)
+
+    def refresh_remote_limit(self):
+        """Lê do serviço o limite de banda que show_rates mostra (roda fora da thread do Tk)"""
+        try:
+            self.remote_limit = self.client.status().get('limit') or 0
+        except (OSError, RuntimeError) as e:
+            self.log_message(f"⚠️ Serviço indisponível: {e}")
         
     def browse_folder(self):
         folder = filedialog.askdirectory()
@@ -181,6 +3057,10 @@ class YouTubeDownloaderSimple:
             
     def clear_log(self):
         self.log_text.delete(1.0, tk.END)
+        # Descarta também a pilha de undo, que guardaria o texto apagado
+        self.log_text.edit_reset()
+        self.log_line_count = 0
+        self.events.clear_progress()
         self.progress_var.set(0)
         self.status_var.set("Log limpo")
         
@@ -193,130 +3073,80 @@ class YouTubeDownloaderSimple:
             
         def fetch_info():
             try:
-                self.status_var.set("Obtendo informações do vídeo...")
+                self.set_status("Obtendo informações do vídeo...")
                 
-                ydl_opts = {
-                    'quiet': True,
-                    'no_warnings': True,
-                }
+                # No modo cliente quem extrai é o serviço
+                info = self.client.info(url) if self.client else self.engine.extract_info(url)
                 
-                with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
+                if 'entries' in info:  # Playlist
+                    self.log_message(f"🎬 PLAYLIST DETECTADA: {info.get('title', 'Sem título')}")
+                    if info.get('playlist_count'):
+                        self.log_message(f"📊 Total de vídeos: {info['playlist_count']}")
+                    self.log_message(f"📝 Descrição: {(info.get('description') or 'Sem descrição')[:100]}...")
                     
-                    if 'entries' in info:  # Playlist
-                        self.log_message(f"🎬 PLAYLIST DETECTADA: {info.get('title', 'Sem título')}")
-                        self.log_message(f"📊 Total de vídeos: {len(info['entries'])}")
-                        self.log_message(f"📝 Descrição: {info.get('description', 'Sem descrição')[:100]}...")
-                        
-                        for i, entry in enumerate(info['entries'][:3]):  # Mostra apenas os 3 primeiros
-                            duration = entry.get('duration', 0)
+                    # As entradas chegam aos poucos: mostra as 3 primeiras e vai contando o resto
+                    count = 0
+                    for entry in info['entries']:
+                        count += 1
+                        if count <= 3:
+                            duration = int(entry.get('duration') or 0)
                             duration_str = f"{duration//60}:{duration%60:02d}" if duration else "N/A"
-                            self.log_message(f"  {i+1}. {entry.get('title', 'Sem título')} ({duration_str})")
-                            
-                        if len(info['entries']) > 3:
-                            self.log_message(f"  ... e mais {len(info['entries']) - 3} vídeos")
-                            
-                    else:  # Vídeo único
-                        duration = info.get('duration', 0)
-                        duration_str = f"{duration//60}:{duration%60:02d}" if duration else "N/A"
-                        
-                        self.log_message(f"🎬 TÍTULO: {info.get('title', 'Sem título')}")
-                        self.log_message(f"👤 CANAL: {info.get('uploader', 'Desconhecido')}")
-                        self.log_message(f"⏱️ DURAÇÃO: {duration_str}")
-                        self.log_message(f"👁️ VISUALIZAÇÕES: {info.get('view_count', 'N/A'):,}")
-                        self.log_message(f"📅 DATA: {info.get('upload_date', 'N/A')}")
-                        self.log_message(f"📝 DESCRIÇÃO: {info.get('description', 'Sem descrição')[:200]}...")
+                            self.log_message(f"  {count}. {entry.get('title', 'Sem título')} ({duration_str})")
+                        elif count % 100 == 0:
+                            self.log_message(f"  ... {count} vídeos encontrados até agora")
+                        self.set_status(f"Listando playlist: {count} vídeos...")
                         
-                        # Formatos disponíveis
-                        formats = info.get('formats', [])
-                        video_formats = [f for f in formats if f.get('vcodec') != 'none']
-                        audio_formats = [f for f in formats if f.get('acodec') != 'none' and f.get('vcodec') == 'none']
+                    self.log_message(f"📊 Total de vídeos: {count}")
                         
-                        self.log_message(f"🎥 FORMATOS DE VÍDEO: {len(video_formats)} disponíveis")
-                        self.log_message(f"🎵 FORMATOS DE ÁUDIO: {len(audio_formats)} disponíveis")
+                else:  # Vídeo único
+                    duration = int(info.get('duration') or 0)
+                    duration_str = f"{duration//60}:{duration%60:02d}" if duration else "N/A"
+                    
+                    self.log_message(f"🎬 TÍTULO: {info.get('title', 'Sem título')}")
+                    self.log_message(f"👤 CANAL: {info.get('uploader', 'Desconhecido')}")
+                    self.log_message(f"⏱️ DURAÇÃO: {duration_str}")
+                    self.log_message(f"👁️ VISUALIZAÇÕES: {info.get('view_count', 'N/A'):,}")
+                    self.log_message(f"📅 DATA: {info.get('upload_date', 'N/A')}")
+                    self.log_message(f"📝 DESCRIÇÃO: {info.get('description', 'Sem descrição')[:200]}...")
+                    
+                    # Formatos disponíveis
+                    formats = info.get('formats', [])
+                    video_formats = [f for f in formats if f.get('vcodec') != 'none']
+                    audio_formats = [f for f in formats if f.get('acodec') != 'none' and f.get('vcodec') == 'none']
+                    
+                    self.log_message(f"🎥 FORMATOS DE VÍDEO: {len(video_formats)} disponíveis")
+                    self.log_message(f"🎵 FORMATOS DE ÁUDIO: {len(audio_formats)} disponíveis")
+                    
+                    # Melhores qualidades disponíveis
+                    best_video = max(video_formats, key=lambda x: x.get('height', 0), default=None)
+                    if best_video:
+                        self.log_message(f"🏆 MELHOR QUALIDADE: {best_video.get('height', 'N/A')}p - {best_video.get('ext', 'N/A')}")
                         
-                        # Melhores qualidades disponíveis
-                        best_video = max(video_formats, key=lambda x: x.get('height', 0), default=None)
-                        if best_video:
-                            self.log_message(f"🏆 MELHOR QUALIDADE: {best_video.get('height', 'N/A')}p - {best_video.get('ext', 'N/A')}")
-                            
-                self.status_var.set("Informações obtidas com sucesso!")
+                self.set_status("Informações obtidas com sucesso!")
                 
             except Exception as e:
                 self.log_message(f"❌ ERRO ao obter informações: {str(e)}")
-                self.status_var.set("Erro ao obter informações")
+                self.set_status("Erro ao obter informações")
                 
         threading.Thread(target=fetch_info, daemon=True).start()
 
     def progress_hook(self, d):
-        """Hook para acompanhar progresso do download"""
-        if d['status'] == 'downloading':
-            total = d.get('total_bytes') or d.get('total_bytes_estimate')
-            downloaded = d.get('downloaded_bytes', 0)
-            if total and downloaded:
-                percent = (downloaded / total) * 100
-                self.progress_var.set(percent)
-            else:
-                self.progress_var.set(0)
-            
-            # Velocidade e ETA
-            speed = d.get('speed', 0)
-            eta = d.get('eta', 0)
-            speed_str = f"{speed/1024/1024:.1f} MB/s" if speed else "N/A"
-            eta_str = f"{eta}s" if eta else "N/A"
-            
-            self.status_var.set(f"Baixando: {self.progress_var.get():.1f}% | {speed_str} | ETA: {eta_str}")
-            
-        elif d['status'] == 'finished':
-            self.progress_var.set(100)
-            self.status_var.set("Download concluído!")
+        """Hook para acompanhar progresso do download
+
+        Roda na thread do download a cada tick do yt-dlp, então só repassa
+        os números para o barramento de eventos; a tela é atualizada em pump_events.
+        """
+        if d['status'] in ('downloading', 'finished'):
+            self.events.progress(d.get('filename') or d.get('tmpfilename'), d['status'],
+                                 d.get('downloaded_bytes') or 0,
+                                 d.get('total_bytes') or d.get('total_bytes_estimate') or 0,
+                                 d.get('speed') or 0.0)
             
     def transcribe_audio(self, audio_path, output_path):
         """Transcreve áudio usando Whisper"""
-        try:
-            self.log_message("🎤 Iniciando transcrição com Whisper...")
-            
-            # Carrega modelo Whisper se não estiver carregado
-            if self.whisper_model is None:
-                self.log_message("📥 Carregando modelo Whisper (primeira vez pode demorar)...")
-                self.whisper_model = whisper.load_model("base")
-                
-            # Transcreve
-            result = self.whisper_model.transcribe(audio_path, language="pt")
-            
-            # Salva transcrição
-            transcript_file = os.path.join(output_path, "transcricao.txt")
-            with open(transcript_file, 'w', encoding='utf-8') as f:
-                f.write("=" * 50 + "\n")
-                f.write("TRANSCRIÇÃO AUTOMÁTICA\n")
-                f.write("=" * 50 + "\n\n")
-                f.write(f"Arquivo: {os.path.basename(audio_path)}\n")
-                f.write(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-                f.write(f"Idioma detectado: {result.get('language', 'português')}\n")
-                f.write("\n" + "=" * 50 + "\n")
-                f.write("TEXTO COMPLETO:\n")
-                f.write("=" * 50 + "\n\n")
-                f.write(result["text"])
-                f.write("\n\n" + "=" * 50 + "\n")
-                f.write("SEGMENTOS COM TIMESTAMPS:\n")
-                f.write("=" * 50 + "\n\n")
-                
-                for segment in result["segments"]:
-                    start_time = segment["start"]
-                    end_time = segment["end"]
-                    text = segment["text"]
-                    
-                    start_str = f"{int(start_time//60):02d}:{int(start_time%60):02d}"
-                    end_str = f"{int(end_time//60):02d}:{int(end_time%60):02d}"
-                    
-                    f.write(f"[{start_str} - {end_str}] {text}\n")
-                    
-            self.log_message(f"✅ Transcrição salva em: {transcript_file}")
-            return transcript_file
-            
-        except Exception as e:
-            self.log_message(f"❌ Erro na transcrição: {str(e)}")
-            return None
+        if self.engine is None:
+            raise RuntimeError("no modo --connect a transcrição roda no serviço")
+        return self.engine.transcribe_audio(audio_path, output_path)
             
     def start_download(self):
         """Inicia o processo de download"""
@@ -325,12 +3155,12 @@ class YouTubeDownloaderSimple:
             messagebox.showerror("Erro", "Por favor, insira uma URL!")
             return
 
-        if not os.path.exists(self.download_path.get()):
+        if not self.client and not os.path.exists(self.download_path.get()):
             messagebox.showerror("Erro", "Pasta de download não existe!")
             return
 
-        # Verifica se ffmpeg está instalado
-        if not self.is_ffmpeg_installed():
+        # Verifica se ffmpeg está instalado (no modo cliente, quem precisa dele é o serviço)
+        if not self.client and not self.is_ffmpeg_installed():
             messagebox.showerror(
                 "FFmpeg não encontrado",
                 "O FFmpeg é necessário para juntar vídeo e áudio e converter para o formato final.\n"
@@ -339,117 +3169,107 @@ class YouTubeDownloaderSimple:
             )
             return
 
-        # Executa download em thread separada
-        threading.Thread(target=self.download_video, args=(url,), daemon=True).start()
+        # Opções lidas aqui, na thread do Tk; o download roda em thread separada
+        self.apply_limits()
+        job = self.build_job(url)
+        threading.Thread(target=self.download_video, args=(url, job), daemon=True).start()
 
     def is_ffmpeg_installed(self):
         """Verifica se ffmpeg está disponível no sistema"""
-        try:
-            subprocess.run(["ffmpeg", "-version"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return True
-        except Exception:
-            return False
+        return is_ffmpeg_installed()
 
-    def download_video(self, url):
+    def build_job(self, url):
+        """Monta o DownloadJob com as opções da tela"""
+        return DownloadJob(
+            url=url,
+            download_path=self.download_path.get(),
+            quality=self.quality_var.get(),
+            format_ext=self.format_var.get(),
+            audio_only=self.audio_only_var.get(),
+            transcribe=self.transcribe_var.get(),
+            playlist=self.playlist_var.get(),
+            playlist_workers=self.playlist_workers_var.get(),
+            fragments=self.fragments_var.get(),
+            chunk_minutes=10 if self.long_audio_var.get() else 0,
+            transcript_formats=('srt', 'vtt', 'json') if self.subtitle_files_var.get() else (),
+            model_name=self.model_var.get(),
+            backend=self.backend_var.get(),
+            transcribe_threads=self.transcribe_threads_var.get(),
+            priority=10 if self.urgent_var.get() else 0,
+            transcript_only=self.transcript_only_var.get(),
+            keep_media=self.keep_media_var.get(),
+        )
+
+    def download_video(self, url, job=None):
         """Executa o download do vídeo"""
+        self.log_message("🚀 Iniciando download...")
+        self.set_status("Preparando download...")
+
+        job = job or self.build_job(url)
+        self.active_jobs[job.job_id] = job
         try:
-            self.log_message("🚀 Iniciando download...")
-            self.status_var.set("Preparando download...")
-            
-            # Cria pasta para o vídeo
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            video_folder = os.path.join(self.download_path.get(), f"video_{timestamp}")
-            os.makedirs(video_folder, exist_ok=True)
-            
-            # Configurações do yt-dlp
-            quality = self.quality_var.get()
-            format_ext = self.format_var.get()
-            audio_only = self.audio_only_var.get()
-            
-            # Formato de saída
-            if audio_only:
-                format_selector = f"bestaudio/best"
-                outtmpl = os.path.join(video_folder, f"%(title)s.%(ext)s")
-                merge_output_format = format_ext
+            if self.client:
+                self.run_remote_job(job)
             else:
-                if quality == "best":
-                    # Melhor vídeo + melhor áudio, depois melhor disponível
-                    format_selector = f"bestvideo+bestaudio/best"
-                elif quality == "worst":
-                    format_selector = f"worstvideo+worstaudio/worst"
-                else:
-                    # Exemplo: 1080p -> height<=1080
-                    height = re.sub(r'\D', '', quality)
-                    format_selector = f"bestvideo[height<={height}]+bestaudio/best[height<={height}]"
-                outtmpl = os.path.join(video_folder, f"%(title)s.%(ext)s")
-                merge_output_format = format_ext
-
-            ydl_opts = {
-                'format': format_selector,
-                'outtmpl': outtmpl,
-                'progress_hooks': [self.progress_hook],
-                'writesubtitles': True,
-                'writeautomaticsub': True,
-                'subtitleslangs': ['pt', 'en'],
-                'ignoreerrors': True,
-                'merge_output_format': merge_output_format,
-            }
-            
-            # Download
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                if self.playlist_var.get():
-                    self.log_message("📋 Baixando playlist...")
-                    ydl.download([url])
-                else:
-                    self.log_message("🎬 Baixando vídeo...")
-                    ydl.download([url])
-                    
-            self.log_message("✅ Download concluído!")
-            
-            # Transcrição automática (apenas para áudio)
-            if self.transcribe_var.get():
-                self.log_message("🎤 Verificando arquivos de áudio para transcrição...")
-                
-                # Procura arquivos de áudio
-                audio_files = []
-                for file in os.listdir(video_folder):
-                    if file.lower().endswith(('.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg')):
-                        audio_files.append(file)
-                
-                if audio_files:
-                    for audio_file in audio_files:
-                        audio_path = os.path.join(video_folder, audio_file)
-                        self.log_message(f"🎵 Transcrevendo: {audio_file}")
-                        self.transcribe_audio(audio_path, video_folder)
-                else:
-                    self.log_message("⚠️  Nenhum arquivo de áudio encontrado para transcrição")
-                    self.log_message("💡 Para transcrever vídeos, marque 'Apenas Áudio' ou use ffmpeg para extrair áudio")
-                    
-            # Salva informações do download
-            info_file = os.path.join(video_folder, "info_download.txt")
-            with open(info_file, 'w', encoding='utf-8') as f:
-                f.write("INFORMAÇÕES DO DOWNLOAD\n")
-                f.write("=" * 30 + "\n\n")
-                f.write(f"URL: {url}\n")
-                f.write(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
-                f.write(f"Qualidade: {quality}\n")
-                f.write(f"Formato: {format_ext}\n")
-                f.write(f"Apenas áudio: {'Sim' if audio_only else 'Não'}\n")
-                f.write(f"Transcrição: {'Sim' if self.transcribe_var.get() else 'Não'}\n")
-                f.write(f"Playlist: {'Sim' if self.playlist_var.get() else 'Não'}\n")
-                f.write(f"Versão: Simplificada (sem MoviePy)\n")
-                
-            self.log_message(f"📁 Arquivos salvos em: {video_folder}")
-            self.status_var.set("Download e processamento concluídos!")
-            
+                self.engine.run_job(job)
+        finally:
+            self.active_jobs.pop(job.job_id, None)
+            if not self.active_jobs:
+                # Streams que morreram sem 'finished' não ficam "baixando" por cima do status final
+                self.events.clear_progress()
+
+        ticks, average = self.events.tick_stats()
+        if ticks:
+            self.log_message(f"📈 {ticks} atualizações de progresso, {average:.1f} µs em média por atualização")
+
+        if job.status == "concluido":
+            self.set_status("Download e processamento concluídos!")
             # Notificação de sucesso
-            messagebox.showinfo("Sucesso!", f"Download concluído!\nPasta: {video_folder}")
-            
-        except Exception as e:
-            self.log_message(f"❌ ERRO no download: {str(e)}")
-            self.status_var.set("Erro no download")
-            messagebox.showerror("Erro", f"Erro no download: {str(e)}")
+            self.show_message("info", "Sucesso!", f"Download concluído!\nPasta: {job.folder}")
+        elif job.status == "parcial":
+            self.set_status("Download concluído com erros")
+            self.show_message("warning", "Atenção", f"{job.error}\nPasta: {job.folder}")
+        else:
+            self.set_status("Erro no download")
+            self.show_message("error", "Erro", f"Erro no download: {job.error}")
             
+    def run_remote_job(self, job, interval=0.5):
+        """Envia o job ao serviço e acompanha log e progresso até ele terminar
+
+        O resultado (status, pasta, erro) é copiado para `job`, então o resto
+        de download_video não precisa saber onde o job rodou.
+        """
+        try:
+            # Os arquivos ficam na pasta do serviço (--output), não na escolhida na janela
+            options = job.options()
+            del options['download_path']
+            job_id = self.client.submit(options)
+            self.log_message(f"🛰️  Job enviado ao serviço: {job_id[:8]}")
+            self.refresh_remote_limit()
+            since = 0
+            while True:
+                state = self.client.job(job_id, since)
+                for message in state['messages']:
+                    self.log_message(message)
+                since = state['next']
+                for key, values in state['progress'].items():
+                    self.events.progress(f"{job_id}:{key}", *values)
+                self.remote_rates[job.job_id] = sum(values[3] for values in state['progress'].values()
+                                                    if values[0] == 'downloading')
+                if state['status'] in FINAL_STATUSES:
+                    break
+                time.sleep(interval)
+        except (OSError, RuntimeError) as e:
+            job.status = "erro"
+            job.error = f"serviço indisponível ou recusou o job: {e}"
+            return
+        finally:
+            self.remote_rates.pop(job.job_id, None)
+        job.status = state['status']
+        job.folder = state['folder']
+        job.error = state['error']
+        job.transcripts = state['transcripts']
+        
     def install_ffmpeg(self):
         """Instala o ffmpeg automaticamente conforme o sistema operacional"""
         self.log_message("🔧 Instalando FFmpeg...")
@@ -471,6 +3291,7 @@ class YouTubeDownloaderSimple:
                 self.log_message("ℹ️ No Windows, baixe manualmente: https://ffmpeg.org/download.html")
                 self.status_var.set("FFmpeg: instale manualmente no Windows")
                 return
+            is_ffmpeg_installed.cache_clear()
             self.log_message("✅ FFmpeg instalado com sucesso!")
             self.status_var.set("FFmpeg instalado com sucesso!")
         except Exception as e:
@@ -479,11 +3300,283 @@ class YouTubeDownloaderSimple:
             
     def run(self):
         """Executa a aplicação"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            if self.engine:
+                self.engine.close()
+
+def read_url_file(path):
+    """Lê um arquivo com uma URL por linha (linhas vazias e # são ignoradas)
+
+    Cada linha pode terminar com uma prioridade numérica (`URL 10`); devolve
+    uma lista de (url, prioridade), com None quando a linha não tem uma.
+    """
+    handle = sys.stdin if path == "-" else open(path, encoding='utf-8')
+    try:
+        urls = []
+        for line in handle:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                url, _, priority = line.partition(" ")
+                priority = priority.strip()
+                urls.append((url, int(priority) if re.fullmatch(r'-?\d+', priority) else None))
+        return urls
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="YouTube Downloader Pro - sem argumentos abre a interface gráfica")
+    parser.add_argument("--batch", metavar="ARQUIVO",
+                        help="arquivo com uma URL por linha para baixar sem interface ('-' lê do stdin)")
+    parser.add_argument("-o", "--output", default=os.path.expanduser("~/Downloads"),
+                        help="pasta de download (padrão: ~/Downloads)")
+    parser.add_argument("-w", "--workers", type=int, default=4,
+                        help="downloads simultâneos (padrão: 4)")
+    parser.add_argument("-q", "--quality", default="best",
+                        choices=QUALITIES)
+    parser.add_argument("-f", "--format", dest="format_ext", default="mp4",
+                        choices=OUTPUT_FORMATS)
+    parser.add_argument("--audio-only", action="store_true", help="baixar apenas o áudio")
+    parser.add_argument("--transcribe", action="store_true", help="transcrever o áudio com Whisper")
+    parser.add_argument("--transcript-only", action="store_true",
+                        help="só a transcrição: baixa o menor áudio que serve para fala e apaga depois")
+    parser.add_argument("--keep-media", action="store_true",
+                        help="com --transcript-only, mantém o áudio baixado")
+    parser.add_argument("--transcribe-workers", type=int, default=1,
+                        help="processos de transcrição em paralelo com os downloads (padrão: 1)")
+    parser.add_argument("--chunk-minutes", type=int, default=0,
+                        help="divide áudios longos em trechos de N minutos transcritos em paralelo")
+    parser.add_argument("--model", default="base", choices=WHISPER_MODELS,
+                        help="modelo Whisper usado na transcrição (padrão: base)")
+    parser.add_argument("--backend", default="whisper", choices=tuple(TRANSCRIBER_BACKENDS),
+                        help="motor de transcrição: whisper (PyTorch fp32) ou faster-whisper (int8, em lote)")
+    parser.add_argument("--transcribe-threads", type=int, default=0,
+                        help="threads de CPU por processo de transcrição (padrão: escolha do motor)")
+    parser.add_argument("--transcribe-batch", type=int, default=8,
+                        help="faster-whisper: trechos de 30s transcritos em lote (padrão: 8; 1 desliga)")
+    parser.add_argument("--compare-backends", metavar="MIDIA",
+                        help="transcreve MIDIA com cada motor e compara velocidade e memória")
+    parser.add_argument("--transcript-formats", default="",
+                        help="saídas extras da transcrição separadas por vírgula: srt,vtt,json")
+    parser.add_argument("--no-transcript-cache", action="store_true",
+                        help="sempre roda o Whisper, mesmo para áudios já transcritos")
+    parser.add_argument("--playlist", action="store_true", help="as URLs são playlists")
+    parser.add_argument("--playlist-workers", type=int, default=4,
+                        help="vídeos de uma playlist baixados ao mesmo tempo (padrão: 4)")
+    parser.add_argument("--fragments", type=int, default=4,
+                        help="fragmentos DASH/HLS simultâneos por vídeo (padrão: 4)")
+    parser.add_argument("--info-ttl", type=int, default=3600,
+                        help="validade em segundos do cache de metadados (padrão: 3600)")
+    parser.add_argument("--clear-info-cache", action="store_true",
+                        help="apaga o cache de metadados antes de começar")
+    parser.add_argument("--reuse", default="link", choices=REUSE_MODES,
+                        help="vídeo já baixado antes: hardlink na pasta nova (padrão), pular ou baixar de novo")
+    parser.add_argument("--retries", type=int, default=3,
+                        help="novas tentativas por vídeo após falha, com espera exponencial (padrão: 3)")
+    parser.add_argument("--resume", action="store_true",
+                        help="retoma os jobs interrompidos (programa fechado ou travado no meio)")
+    parser.add_argument("--priority", type=int, default=0,
+                        help="prioridade das URLs sem prioridade própria no arquivo; maior passa na frente (padrão: 0)")
+    parser.add_argument("--limit-rate", default="0", metavar="TAXA",
+                        help="banda máxima somando todos os downloads, ex.: 500K, 5M (padrão: sem limite)")
+    parser.add_argument("--max-per-host", type=int, default=0,
+                        help="conexões simultâneas por servidor, somando todos os downloads (padrão: sem limite)")
+    parser.add_argument("--verify-index", action="store_true",
+                        help="confere o índice de downloads contra o disco e sai")
+    parser.add_argument("--repair-index", action="store_true",
+                        help="com --verify-index, remove do índice os arquivos ausentes ou alterados")
+    parser.add_argument("--serve", action="store_true",
+                        help="roda como serviço local com API HTTP/JSON, modelo carregado e pools compartilhados")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço do serviço (padrão: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8777, help="porta do serviço (padrão: 8777)")
+    parser.add_argument("--connect", metavar="URL",
+                        help="abre a janela como cliente de um serviço, ex.: http://127.0.0.1:8777")
+    parser.add_argument("--log-lines", type=int, default=2000,
+                        help="linhas mantidas no log da interface gráfica (padrão: 2000)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="mostrar a saída do yt-dlp")
+    return parser
+
+
+def make_cli_logger():
+    """Função de log da linha de comando: hora + mensagem, uma linha por vez entre as threads"""
+    log_lock = threading.Lock()
+
+    def log(message):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        with log_lock:
+            print(f"[{timestamp}] {message}", flush=True)
+    return log
+
+
+def parse_rate_arg(args):
+    """Limite de banda de --limit-rate em bytes/s (0 = sem limite), ou None se for inválido"""
+    rate = yt_dlp.utils.parse_bytes(args.limit_rate)
+    if rate is None:
+        print(f"❌ Limite de banda inválido: {args.limit_rate}")
+    return rate
+
+
+def run_batch_cli(args):
+    """Executa um lote de URLs sem interface gráfica"""
+    urls = read_url_file(args.batch) if args.batch else []
+    if not urls and not args.resume:
+        print("❌ Nenhuma URL encontrada no arquivo")
+        return 1
+    if not os.path.isdir(args.output):
+        print(f"❌ Pasta de download não existe: {args.output}")
+        return 1
+    if not is_ffmpeg_installed():
+        print("❌ FFmpeg não encontrado. Instale o FFmpeg antes de baixar vídeos.")
+        return 1
+
+    log = make_cli_logger()
+
+    transcript_formats = tuple(fmt.strip() for fmt in args.transcript_formats.split(",") if fmt.strip())
+    unknown = [fmt for fmt in transcript_formats if fmt not in TRANSCRIPT_WRITERS]
+    if unknown:
+        print(f"❌ Formato de transcrição desconhecido: {', '.join(unknown)}")
+        return 1
+
+    rate = parse_rate_arg(args)
+    if rate is None:
+        return 1
+
+    jobs = [DownloadJob(url=url, download_path=args.output, quality=args.quality,
+                        format_ext=args.format_ext, audio_only=args.audio_only,
+                        transcribe=args.transcribe, playlist=args.playlist,
+                        playlist_workers=args.playlist_workers, fragments=args.fragments,
+                        chunk_minutes=args.chunk_minutes, transcript_formats=transcript_formats,
+                        model_name=args.model, backend=args.backend,
+                        transcribe_threads=args.transcribe_threads, transcribe_batch=args.transcribe_batch,
+                        reuse=args.reuse, retries=args.retries,
+                        transcript_only=args.transcript_only, keep_media=args.keep_media,
+                        priority=args.priority if priority is None else priority)
+            for url, priority in urls]
+
+    info_cache = InfoCache(ttl=args.info_ttl)
+    if args.clear_info_cache:
+        info_cache.clear()
+        log("🧹 Cache de metadados apagado")
+
+    engine = DownloadEngine(workers=args.workers, log=log, quiet=not args.verbose, info_cache=info_cache,
+                            transcribe_workers=args.transcribe_workers,
+                            transcript_cache=not args.no_transcript_cache)
+    engine.scheduler.configure(rate=rate, max_per_host=args.max_per_host)
+    if rate or args.max_per_host:
+        log(f"🚦 Banda: {format_rate(rate)}, conexões por host: {args.max_per_host or 'sem limite'}")
+    if args.resume:
+        resumed = engine.resume_unfinished()
+        log(f"⏯️  {len(resumed)} jobs interrompidos serão retomados")
+        jobs = resumed + jobs
+    log(f"🚀 {len(jobs)} URLs na fila, {engine.workers} downloads simultâneos")
+    try:
+        engine.run_batch(jobs)
+    finally:
+        engine.close()
+
+    failed = [job for job in jobs if job.status != "concluido"]
+    log(f"✅ {len(jobs) - len(failed)} concluídos, ❌ {len(failed)} com erro")
+    stages = engine.metrics.snapshot()
+    if stages:
+        log(f"⏱️ Etapas: {format_stages(stages)}")
+    for job in failed:
+        log(f"  ❌ {job.url}: {job.error}")
+        for index, url, error in sorted(job.failed_entries):
+            log(f"      {index}. {url}: {error}")
+    return 1 if failed else 0
+
+
+def verify_index_cli(args):
+    """Confere (e opcionalmente repara) o índice de downloads"""
+    index = DownloadIndex()
+    valid, broken = index.verify(repair=args.repair_index)
+    print(f"📚 Índice: {index.path}")
+    print(f"✅ {valid} arquivos conferem com o disco")
+    for path in broken:
+        print(f"  ❌ ausente ou alterado: {path}")
+    if broken:
+        if args.repair_index:
+            print(f"🔧 {len(broken)} registros removidos do índice")
+        else:
+            print("💡 Use --repair-index para remover esses registros")
+    return 1 if broken and not args.repair_index else 0
+
+
+def compare_backends_cli(args):
+    """Transcreve a mesma mídia com cada motor, cada um num processo novo, e compara"""
+    if not os.path.isfile(args.compare_backends):
+        print(f"❌ Arquivo não encontrado: {args.compare_backends}")
+        return 1
+    print(f"⚖️  Comparando motores com o modelo {args.model}: {args.compare_backends}")
+    rows = []
+    for backend in TRANSCRIBER_BACKENDS:
+        spec = TranscriberSpec(backend, args.model, args.transcribe_threads, args.transcribe_batch)
+        # Processo novo por motor: o pico de memória de um não contamina o outro
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            try:
+                rows.append(pool.submit(benchmark_transcriber, spec, args.compare_backends).result())
+            except Exception as e:
+                print(f"  ❌ {backend}: {e}")
+
+    print(f"{'motor':<16}{'carga':>8}{'transcrição':>13}{'x tempo real':>14}{'pico RAM':>11}{'segmentos':>11}")
+    for row in rows:
+        speed = row['audio_seconds'] / row['transcribe_seconds'] if row['transcribe_seconds'] else 0.0
+        memory = f"{row['peak_rss_mb']:.0f} MB" if row['peak_rss_mb'] is not None else "N/A"
+        print(f"{row['backend']:<16}{row['load_seconds']:>7.1f}s{row['transcribe_seconds']:>12.1f}s"
+              f"{speed:>13.1f}x{memory:>11}{row['segments']:>11}")
+    for row in rows:
+        print(f"  {row['backend']}: {row['text'].strip()[:100]}")
+    return 0 if len(rows) == len(TRANSCRIBER_BACKENDS) else 1
+
+
+def serve_cli(args):
+    """Roda o serviço local até Ctrl+C"""
+    if not os.path.isdir(args.output):
+        print(f"❌ Pasta de download não existe: {args.output}")
+        return 1
+    rate = parse_rate_arg(args)
+    if rate is None:
+        return 1
+
+    log = make_cli_logger()
+
+    engine = DownloadEngine(workers=args.workers, log=log, quiet=not args.verbose,
+                            info_cache=InfoCache(ttl=args.info_ttl),
+                            transcribe_workers=args.transcribe_workers,
+                            transcript_cache=not args.no_transcript_cache)
+    engine.scheduler.configure(rate=rate, max_per_host=args.max_per_host)
+    spec = TranscriberSpec(args.backend, args.model, args.transcribe_threads, args.transcribe_batch)
+    service = DownloadService(engine, args.output, spec)
+    try:
+        serve(service, args.host, args.port)
+    except KeyboardInterrupt:
+        log("👋 Serviço encerrado")
+    finally:
+        engine.close()
+    return 0
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.verify_index:
+        return verify_index_cli(args)
+    if args.compare_backends:
+        return compare_backends_cli(args)
+    if args.serve:
+        return serve_cli(args)
+    if args.batch or args.resume:
+        return run_batch_cli(args)
 
-if __name__ == "__main__":
     print("🎬 Iniciando YouTube Downloader Pro (Versão Simplificada)...")
     print("📋 Esta versão não precisa do MoviePy!")
     
-    app = YouTubeDownloaderSimple()
-    app.run()
\ No newline at end of file
+    app = YouTubeDownloaderSimple(max_log_lines=args.log_lines, service_url=args.connect)
+    app.run()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())